@@ -1,21 +1,31 @@
 from telethon import TelegramClient, functions, types
 from telethon.errors import ChannelPrivateError, FloodWaitError, UsernameNotOccupiedError, UpdateAppToLoginError
+import argparse
 import csv
 import os
 import re
 import asyncio
+import cProfile
 import json
-import random
 from datetime import datetime, timedelta
 import time
 from dotenv import load_dotenv
+import profiler
+from username_triage import USER_ERROR_MARKERS, count_reasons, load_known_users, normalize_username, print_report, save_skipped, triage_usernames
+from api_credentials import choose_better_session, choose_session, get_api_credentials, missing_api_credentials, print_group_stats, record_flood_wait, record_request
+from crawl_frontier import FRONTIER_CAPACITY, BloomFilter, CrawlFrontier
+from timestamp_store import STORE_HISTORY_LIMIT, TimestampStore, history_coverage
+from hedging import HEDGE_BUDGET, Hedger
+from session_storage import (
+    SESSION_FLUSH_INTERVAL, SessionsInfoState, flush_sessions_periodically, open_session,
+    persist_client_session, save_json_atomic
+)
 
 # Load environment variables from .env file
 load_dotenv()
 
-# API credentials from environment variables
-API_ID = os.getenv('TELEGRAM_API_ID')
-API_HASH = os.getenv('TELEGRAM_API_HASH')
+# Keep sessions in memory and flush them to sessions/ on a timer instead of per request
+MEMORY_SESSIONS = os.getenv('TELEGRAM_MEMORY_SESSIONS') == '1'
 
 # File paths
 INPUT_FILE = 'Results/Results.txt'
@@ -23,9 +33,36 @@ OUTPUT_FILE = 'Results/Table.csv'
 PROGRESS_FILE = 'Results/progress.json'
 SESSIONS_DIR = 'sessions'
 SESSIONS_INFO_FILE = 'sessions/sessions_info.json'
+# In-memory sessions_info is the authority; changes are flushed by the session flusher
+SESSIONS_STATE = SessionsInfoState(SESSIONS_INFO_FILE)
+DAEMON_QUEUE_DIR = 'Results/queue'
+DAEMON_STATE_FILE = 'Results/daemon_state.json'
+DAEMON_STATE_FLUSH_INTERVAL = 30  # Seconds between daemon state writes (and on shutdown)
+PROFILE_TRACE_FILE = 'Results/trace.json'
+CRAWL_LOG_FILE = 'Results/crawl.csv'
+SKIPPED_FILE = 'Results/skipped.csv'  # Not .txt: html_parser aggregates every .txt in Results/
+
+# Username patterns in channel descriptions
+USERNAME_PATTERN = re.compile(r'@([a-zA-Z0-9_]{5,32})')
+# Mentions and t.me links; after a word character or dot they are part of an email or another domain
+MENTION_PATTERN = re.compile(
+    r'(?<![\w.])(?:@|(?:https?://)?(?:www\.)?(?:t|telegram)\.me/(?:s/)?)([a-zA-Z][a-zA-Z0-9_]{3,31})\b',
+    re.IGNORECASE
+)
+# t.me paths that are not usernames
+RESERVED_LINK_PATHS = {'joinchat', 'addstickers', 'addemoji', 'addtheme', 'addlist', 'share', 'proxy', 'socks', 'setlanguage', 'contact', 'iv'}
 
 # Constants
 MAX_FLOOD_WAIT_TIME = 300  # 5 minutes in seconds
+REFRESH_INTERVAL = 24 * 60 * 60  # Daemon: re-scrape channels older than a day
+WATCH_INTERVAL = 30  # Daemon: seconds between input checks when idle
+DEAD_CHANNEL_BACKOFF = 7 * 24 * 60 * 60  # Daemon: re-check private/nonexistent channels weekly
+PERMANENT_RESULTS = ('Приватный канал', 'Канал не существует')
+TRIAGE_USERNAMES = True  # Drop invalid, bot, user and duplicate handles before any API call
+CRAWL_DEPTH = 1  # Crawl: how many hops from the seed channels to follow
+CRAWL_BUDGET = 1000  # Crawl: maximum number of channels to scrape in one run
+HEDGE_REQUESTS = False  # Repeat requests slower than the observed p95 on another session
+STORE_TIMESTAMPS = False  # Keep fetched post dates and ids in the columnar timestamp store
 
 def extract_username(about):
     """
@@ -41,14 +78,37 @@ def extract_username(about):
         return None
     
     # Looking for @username pattern in the description
-    username_pattern = r'@([a-zA-Z0-9_]{5,32})'
-    match = re.search(username_pattern, about)
+    match = USERNAME_PATTERN.search(about)
     
     if match:
         return '@' + match.group(1)
     return None
 
-async def get_channel_info(client, username, active_session, sessions_info):
+def extract_usernames(about):
+    """
+    Extract every @username and t.me link from channel description/about text
+    
+    Args:
+        about (str): Channel description text
+        
+    Returns:
+        list: Unique usernames with @ in order of appearance
+    """
+    if not about:
+        return []
+    
+    usernames = []
+    seen = set()
+    for match in MENTION_PATTERN.finditer(about):
+        username = match.group(1)
+        key = username.lower()
+        if key in RESERVED_LINK_PATHS or key in seen:
+            continue
+        seen.add(key)
+        usernames.append('@' + username)
+    return usernames
+
+async def get_channel_info(client, username, active_session, sessions_info, discovered=None, hedger=None, store=None):
     """
     Get channel information for a specific username
     
@@ -57,23 +117,44 @@ async def get_channel_info(client, username, active_session, sessions_info):
         username: Channel username (without '@')
         active_session: Current active session information
         sessions_info: List of all available sessions
+        discovered: Optional list extended with every handle found in the description
+        hedger: Optional Hedger that repeats slow requests on another session
+        store: Optional TimestampStore that receives dates and ids of fetched posts
         
     Returns:
         Tuple with (last_post_date, posts_last_week, description_username, session_change)
         session_change will be True if a session switch occurred
     """
     try:
+        # Resolve the username once; later requests reuse the cached entity
+        with profiler.span('resolve', channel=username):
+            entity = await client.get_input_entity(username)
+        
+        async def request(kind, call):
+            # call(client, peer): the resolved entity is only valid for this
+            # client's account, so a hedged copy resolves the username itself
+            if hedger is None:
+                return await call(client, entity)
+            return await hedger.call(kind, client, lambda c: call(c, entity), lambda c: call(c, username))
+        
         # Get channel information
-        channel = await client(functions.channels.GetFullChannelRequest(
-            channel=username
-        ))
+        with profiler.span('get_full_channel', channel=username):
+            channel = await request('get_full_channel', lambda c, peer: c(
+                functions.channels.GetFullChannelRequest(channel=peer)
+            ))
         
         # Get channel description
         about = channel.full_chat.about
         description_username = extract_username(about)
+        if discovered is not None:
+            discovered.extend(extract_usernames(about))
         
-        # Get the most recent message
-        messages = await client.get_messages(username, limit=1)
+        # Get the most recent message (a full page of recent posts for the
+        # timestamp store costs the same single request)
+        history_limit = STORE_HISTORY_LIMIT if store is not None else 1
+        fetched_at = datetime.now()
+        with profiler.span('last_message', channel=username):
+            messages = await request('last_message', lambda c, peer: c.get_messages(peer, limit=history_limit))
         last_post_date = None
         
         if messages and len(messages) > 0:
@@ -83,18 +164,14 @@ async def get_channel_info(client, username, active_session, sessions_info):
         week_ago = datetime.now() - timedelta(days=7)
         
         # Use offset_date to get messages from the last 7 days
-        messages_last_week = await client.get_messages(
-            username, 
-            limit=100,  # Reasonable limit to avoid excessive API calls
-            offset_date=week_ago
-        )
+        with profiler.span('week_history', channel=username):
+            messages_last_week = await request('week_history', lambda c, peer: c.get_messages(
+                peer, 
+                limit=100,  # Reasonable limit to avoid excessive API calls
+                offset_date=week_ago
+            ))
         
         posts_last_week = len(messages_last_week)
-        
-        # Format the last post date for output
-        formatted_date = last_post_date.strftime('%Y-%m-%d') if last_post_date else '-'
-        
-        return (formatted_date, posts_last_week, description_username or '-', False)
     
     except ChannelPrivateError:
         return ('Приватный канал', '-', '-', False)
@@ -104,6 +181,7 @@ async def get_channel_info(client, username, active_session, sessions_info):
     
     except FloodWaitError as e:
         print(f"Hit rate limit. Wait time: {e.seconds} seconds.")
+        record_flood_wait(active_session, e.seconds)
         
         # Check if wait time exceeds threshold for switching
         if e.seconds > MAX_FLOOD_WAIT_TIME:
@@ -120,12 +198,29 @@ async def get_channel_info(client, username, active_session, sessions_info):
                 print("No alternative sessions available. Waiting for the required time...")
         
         # If wait time is acceptable or no alternative sessions, wait and retry
-        await asyncio.sleep(e.seconds)
-        return await get_channel_info(client, username, active_session, sessions_info)
+        with profiler.span('flood_wait', channel=username, seconds=e.seconds):
+            await asyncio.sleep(e.seconds)
+        return await get_channel_info(client, username, active_session, sessions_info, discovered, hedger, store)
     
     except Exception as e:
         print(f"Error processing {username}: {str(e)}")
         return (f'Ошибка: {str(e)}', '-', '-', False)
+    
+    # Outside the try above: a store failure must not turn a good row into an error
+    if store is not None:
+        try:
+            with profiler.span('store_write', channel=username):
+                store.add_messages(username, list(messages) + list(messages_last_week), [
+                    history_coverage(messages, history_limit, fetched_at),
+                    history_coverage(messages_last_week, 100, week_ago)
+                ])
+        except Exception as e:
+            print(f"Error storing timestamps of {username}: {str(e)}")
+    
+    # Format the last post date for output
+    formatted_date = last_post_date.strftime('%Y-%m-%d') if last_post_date else '-'
+    
+    return (formatted_date, posts_last_week, description_username or '-', False)
 
 async def switch_session(current_session, sessions_info):
     """
@@ -141,6 +236,7 @@ async def switch_session(current_session, sessions_info):
     available_sessions = [
         session for session in sessions_info 
         if session['status'] == 'available' and session['session_name'] != current_session['session_name']
+        and get_api_credentials(session)[0] is not None
     ]
     
     if not available_sessions:
@@ -152,24 +248,19 @@ async def switch_session(current_session, sessions_info):
             session['status'] = 'cooldown'
             session['cooldown_until'] = (datetime.now() + timedelta(minutes=30)).isoformat()
     
-    # Save updated session info
-    with open(SESSIONS_INFO_FILE, 'w') as f:
-        json.dump(sessions_info, f, indent=4)
+    # Written to disk by the session flusher, not on every switch
+    SESSIONS_STATE.mark_dirty()
     
-    # Return a random available session
-    return random.choice(available_sessions)
+    # Prefer the credential group with the fewest flood waits
+    return choose_session(available_sessions)
 
-async def get_available_session(sessions_info):
+def release_cooldowns(sessions_info):
     """
-    Get an available session from the sessions pool
+    Make sessions whose cooldown has expired available again
     
     Args:
         sessions_info: List of all sessions
-        
-    Returns:
-        Available session info or None if no available sessions
     """
-    # Update status for sessions that were on cooldown but are now available
     current_time = datetime.now()
     
     for session in sessions_info:
@@ -179,31 +270,83 @@ async def get_available_session(sessions_info):
                 session['status'] = 'available'
                 if 'cooldown_until' in session:
                     del session['cooldown_until']
+                SESSIONS_STATE.mark_dirty()
+
+async def get_available_session(sessions_info):
+    """
+    Get an available session from the sessions pool
+    
+    Args:
+        sessions_info: List of all sessions
+        
+    Returns:
+        Available session info or None if no available sessions
+    """
+    # Update status for sessions that were on cooldown but are now available
+    release_cooldowns(sessions_info)
     
     # Find available sessions
-    available_sessions = [session for session in sessions_info if session['status'] == 'available']
+    available_sessions = [
+        session for session in sessions_info
+        if session['status'] == 'available' and get_api_credentials(session)[0] is not None
+    ]
     
     if not available_sessions:
         return None
     
-    # Save updated session info
-    with open(SESSIONS_INFO_FILE, 'w') as f:
-        json.dump(sessions_info, f, indent=4)
+    # Prefer the credential group with the fewest flood waits
+    return choose_session(available_sessions)
+
+async def rebalance_session(active_session, client, sessions_info, clients):
+    """
+    Move to a credential group with a lower flood-wait rate between channels
     
-    # Return a random available session
-    return random.choice(available_sessions)
+    Flood waits short enough to sleep through do not switch sessions, so the
+    group balance is re-checked before every channel. Warm clients are reused.
+    
+    Args:
+        active_session: Current session
+        client: Current client
+        sessions_info: List of all sessions
+        clients: Dict of session_name -> connected client
+        
+    Returns:
+        Tuple of (session, client) to use for the next channel
+    """
+    release_cooldowns(sessions_info)
+    candidates = [
+        session for session in sessions_info
+        if session['status'] == 'available' and session['session_name'] != active_session['session_name']
+        and get_api_credentials(session)[0] is not None
+    ]
+    
+    new_session = choose_better_session(active_session, candidates)
+    if not new_session:
+        return active_session, client
+    
+    try:
+        with profiler.span('session_switch', session=new_session['session_name']):
+            new_client = await start_client(new_session, clients)
+    except Exception as e:
+        print(f"Error starting client {new_session['session_name']}: {str(e)}")
+        return active_session, client
+    
+    print(f"Rebalanced to session {new_session['session_name']} (fewer flood waits in its API group)")
+    return new_session, new_client
 
-def save_progress(username, is_processed):
+def save_progress(username, is_processed, offset=None):
     """
     Save progress information to allow resuming
     
     Args:
         username: Current username being processed
         is_processed: Whether processing completed successfully
+        offset: Byte offset of the username's line in INPUT_FILE
     """
     progress = {
         'last_username': username,
         'is_processed': is_processed,
+        'offset': offset,
         'timestamp': datetime.now().isoformat()
     }
     
@@ -230,6 +373,63 @@ def load_progress():
         print(f"Error loading progress file: {str(e)}")
         return None
 
+def stream_usernames(path, offset=0):
+    """
+    Lazily read usernames from a file starting at a byte offset
+    
+    Args:
+        path: Path to a text file with one username per line
+        offset: Byte offset to start reading from (must be a line start)
+        
+    Yields:
+        Tuple of (username, line_offset, next_offset) for every non-empty line
+    """
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        for raw_line in file:
+            line_offset = offset
+            offset += len(raw_line)
+            username = raw_line.decode('utf-8').strip()
+            if username:
+                yield username, line_offset, offset
+
+def find_resume_offset(progress):
+    """
+    Find the byte offset in INPUT_FILE to resume from
+    
+    The checkpointed offset is used directly if the line there is still the
+    last processed username; otherwise (old progress file without offsets,
+    or the input file was rewritten) the file is scanned for the username.
+    
+    Args:
+        progress: Progress information from load_progress()
+        
+    Returns:
+        int: Offset of the first line to process
+    """
+    if not progress:
+        return 0
+    
+    last_username = normalize_username(progress['last_username']).lower()
+    
+    def resume_at(line_offset, next_offset):
+        # If last channel was processed successfully, start from next one,
+        # otherwise retry it
+        return next_offset if progress['is_processed'] else line_offset
+    
+    offset = progress.get('offset')
+    if offset is not None:
+        for username, line_offset, next_offset in stream_usernames(INPUT_FILE, offset):
+            if line_offset == offset and normalize_username(username).lower() == last_username:
+                return resume_at(line_offset, next_offset)
+            break
+    
+    for username, line_offset, next_offset in stream_usernames(INPUT_FILE):
+        if normalize_username(username).lower() == last_username:
+            return resume_at(line_offset, next_offset)
+    
+    return 0
+
 async def save_channel_result(writer, username, data):
     """
     Save channel data to CSV
@@ -242,7 +442,122 @@ async def save_channel_result(writer, username, data):
     last_post_date, posts_last_week, description_username = data
     writer.writerow([username, last_post_date, posts_last_week, description_username])
 
-async def process_channel(client, username, active_session, sessions_info, writer):
+async def start_client(session_info, clients=None):
+    """
+    Start a Telegram client for a session, reusing a warm one from the pool
+    
+    Args:
+        session_info: Session info with the session name and optional API credentials
+        clients: Optional dict of session_name -> connected client
+        
+    Returns:
+        Started Telegram client
+    """
+    session_name = session_info['session_name']
+    api_id, api_hash, _ = get_api_credentials(session_info)
+    
+    if clients is not None:
+        client = clients.get(session_name)
+        if client and client.is_connected():
+            return client
+    
+    session_path = os.path.join(SESSIONS_DIR, session_name)
+    session = open_session(session_path, MEMORY_SESSIONS)
+    client = TelegramClient(session, api_id, api_hash, system_version="4.16.30-vxCUSTOM")
+    
+    try:
+        await client.start()
+    except Exception:
+        await client.disconnect()
+        raise
+    
+    if clients is not None:
+        clients[session_name] = client
+    
+    return client
+
+async def disconnect_clients(clients):
+    """
+    Disconnect every client in the pool and flush in-memory sessions
+    
+    Args:
+        clients: Dict of session_name -> client
+    """
+    for client in clients.values():
+        if client.is_connected():
+            await client.disconnect()
+        persist_client_session(client)
+    clients.clear()
+
+def create_hedger(sessions_info, clients):
+    """
+    Create a Hedger that takes backup clients from idle available sessions
+    
+    Backups are connected clients from the pool; when there are none, one is
+    started in the background and the current request is not hedged.
+    
+    Args:
+        sessions_info: List of all sessions
+        clients: Dict of session_name -> client, backup clients are added to it
+        
+    Returns:
+        Hedger or None if hedging is disabled
+    """
+    if not HEDGE_REQUESTS:
+        return None
+    
+    warming = {}
+    
+    async def warm_up(session):
+        try:
+            await start_client(session, clients)
+        except Exception as e:
+            print(f"Error starting backup client {session['session_name']}: {str(e)}")
+        finally:
+            warming.pop(session['session_name'], None)
+    
+    async def get_backup_client(primary_client):
+        candidates = [
+            session for session in sessions_info
+            if session['status'] == 'available'
+            and clients.get(session['session_name']) is not primary_client
+            and get_api_credentials(session)[0] is not None
+        ]
+        
+        # Only connected clients are used as backups; connecting one takes
+        # longer than the request being hedged
+        warm = [
+            session for session in candidates
+            if clients.get(session['session_name']) and clients[session['session_name']].is_connected()
+        ]
+        session = choose_session(warm)
+        if session:
+            return clients[session['session_name']]
+        
+        # Warm one up in the background for the next slow request
+        session = choose_session(candidates)
+        if session and not warming:
+            warming[session['session_name']] = asyncio.create_task(warm_up(session))
+        return None
+    
+    return Hedger(get_backup_client, HEDGE_BUDGET)
+
+def start_session_flusher(clients, sessions_info):
+    """
+    Start periodic flushing of sessions_info changes and in-memory sessions
+    
+    Args:
+        clients: Dict of session_name -> client
+        sessions_info: List of all sessions
+        
+    Returns:
+        asyncio.Task
+    """
+    return asyncio.create_task(
+        flush_sessions_periodically(clients, SESSION_FLUSH_INTERVAL, sessions_info, SESSIONS_STATE)
+    )
+
+async def process_channel(client, username, active_session, sessions_info, writer, clients=None, discovered=None, hedger=None, store=None, results=None):
     """
     Process a single channel and save its results
     
@@ -252,6 +567,11 @@ async def process_channel(client, username, active_session, sessions_info, write
         active_session: Current active session
         sessions_info: List of all sessions
         writer: CSV writer for output
+        clients: Optional pool of warm clients to reuse on session switch
+        discovered: Optional list extended with every handle found in the description
+        hedger: Optional Hedger that repeats slow requests on another session
+        store: Optional TimestampStore that receives dates and ids of fetched posts
+        results: Optional list that receives the written (last_post_date, posts_last_week, description_username)
         
     Returns:
         Tuple of (success, new_session, new_client) where:
@@ -266,7 +586,7 @@ async def process_channel(client, username, active_session, sessions_info, write
     
     # Get channel info
     channel_data, posts_last_week, description_username, session_changed = await get_channel_info(
-        client, clean_username, active_session, sessions_info
+        client, clean_username, active_session, sessions_info, discovered, hedger, store
     )
     
     # If session switch occurred
@@ -278,29 +598,34 @@ async def process_channel(client, username, active_session, sessions_info, write
             print("No available sessions. Cannot continue.")
             return False, None, None
         
-        # Create a new client with the new session
-        session_path = os.path.join(SESSIONS_DIR, new_session['session_name'])
-        new_client = TelegramClient(session_path, int(API_ID), API_HASH, system_version="4.16.30-vxCUSTOM")
-        
+        # Create a new client with the new session (or reuse a warm one)
         try:
-            await new_client.start()
+            with profiler.span('session_switch', session=new_session['session_name']):
+                new_client = await start_client(new_session, clients)
             print(f"Started new client with session: {new_session['session_name']}")
-            
-            # Process the channel with the new client
-            return await process_channel(new_client, username, new_session, sessions_info, writer)
         except Exception as e:
             print(f"Error starting new client: {str(e)}")
-            await new_client.disconnect()
             return False, None, None
+        
+        # Process the channel with the new client
+        success, switched_session, switched_client = await process_channel(
+            new_client, username, new_session, sessions_info, writer, clients, discovered, hedger, store, results
+        )
+        if switched_session and switched_client:
+            return success, switched_session, switched_client
+        return success, new_session, new_client
     
     # Write results to CSV
-    await save_channel_result(writer, username, (channel_data, posts_last_week, description_username))
+    with profiler.span('csv_write', channel=username):
+        await save_channel_result(writer, username, (channel_data, posts_last_week, description_username))
+    if results is not None:
+        results.append((channel_data, posts_last_week, description_username))
     
-    # Save progress
-    save_progress(username, True)
+    record_request(active_session)
     
     # Add delay to avoid hitting rate limits too quickly
-    await asyncio.sleep(1)
+    with profiler.span('sleep', channel=username):
+        await asyncio.sleep(1)
     
     return True, None, None
 
@@ -340,9 +665,8 @@ def regenerate_sessions_info():
             
             new_sessions_info.append(session_info)
             
-        # Сохраняем новый sessions_info
-        with open(SESSIONS_INFO_FILE, 'w') as f:
-            json.dump(new_sessions_info, f, indent=4)
+        # Сохраняем новый sessions_info (атомарно)
+        save_json_atomic(new_sessions_info, SESSIONS_INFO_FILE)
             
         print(f"Успешно перегенерирован {SESSIONS_INFO_FILE} с {len(new_sessions_info)} сессиями.")
         return True
@@ -351,25 +675,35 @@ def regenerate_sessions_info():
         print(f"Ошибка при перегенерации sessions_info: {str(e)}")
         return False
 
-async def main():
+def check_api_credentials(sessions_info):
     """
-    Main function to process all channels and save results to CSV
+    Check that sessions have API credentials (own, group or default from .env)
     
+    Args:
+        sessions_info: List of all sessions
+        
     Returns:
-        str: The last username being processed or None
+        bool: Whether at least one session can be used
     """
-    # Check if API credentials are available
-    if not API_ID or not API_HASH:
-        print("Error: API credentials not found in .env file")
-        print("Please create a .env file with TELEGRAM_API_ID and TELEGRAM_API_HASH")
-        return None
+    missing = missing_api_credentials(sessions_info)
+    if not missing:
+        return True
+    
+    if len(missing) < len(sessions_info):
+        print(f"Warning: no API credentials for sessions {', '.join(missing)}; they will be skipped")
+        return True
+    
+    print("Error: API credentials not found in .env file")
+    print("Please create a .env file with TELEGRAM_API_ID and TELEGRAM_API_HASH")
+    return False
 
-    # Check if sessions are available
-    if not os.path.exists(SESSIONS_INFO_FILE):
-        print("Error: No sessions found. Please run create_sessions.py first.")
-        return
+def load_sessions_info():
+    """
+    Load sessions info, regenerating the file if it is damaged
     
-    # Load sessions info
+    Returns:
+        list: Sessions info or None if it could not be loaded
+    """
     try:
         with open(SESSIONS_INFO_FILE, 'r') as f:
             sessions_info = json.load(f)
@@ -385,7 +719,7 @@ async def main():
                     sessions_info = json.load(f)
             else:
                 print("Не удалось перегенерировать sessions_info.json. Пожалуйста, запустите create_sessions.py снова.")
-                return
+                return None
                 
     except Exception as e:
         print(f"Ошибка загрузки sessions_info: {str(e)}")
@@ -398,7 +732,474 @@ async def main():
                 sessions_info = json.load(f)
         else:
             print("Не удалось перегенерировать sessions_info.json. Пожалуйста, запустите create_sessions.py снова.")
+            return None
+    
+    return sessions_info
+
+def open_output_file():
+    """
+    Open the output CSV for appending, writing the header if the file is new
+    
+    Returns:
+        file: Opened CSV file object
+    """
+    # Create Results directory if it doesn't exist
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    
+    # Check if output file exists and has header
+    file_exists = os.path.exists(OUTPUT_FILE) and os.path.getsize(OUTPUT_FILE) > 0
+    
+    csvfile = open(OUTPUT_FILE, 'a' if file_exists else 'w', newline='', encoding='utf-8')
+    
+    # Write header if file is new
+    if not file_exists:
+        csv.writer(csvfile).writerow(['Юзернейм канала', 'Дата последнего поста', 'Количество постов за неделю', 'Юзернейм из описания'])
+    
+    return csvfile
+
+def load_daemon_state():
+    """
+    Load the daemon state: when each watched channel was last scraped
+    
+    Returns:
+        dict: username -> ISO timestamp of the last scrape (None if never scraped)
+    """
+    if not os.path.exists(DAEMON_STATE_FILE):
+        return {}
+    
+    try:
+        with open(DAEMON_STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading daemon state: {str(e)}")
+        return {}
+
+def save_daemon_state(state):
+    """
+    Save the daemon state atomically (temp file + rename)
+    
+    Args:
+        state: Dict of username -> ISO timestamp of the last scrape
+    """
+    os.makedirs(os.path.dirname(DAEMON_STATE_FILE), exist_ok=True)
+    
+    try:
+        save_json_atomic(state, DAEMON_STATE_FILE)
+    except Exception as e:
+        print(f"Error saving daemon state: {str(e)}")
+
+def read_usernames(path):
+    """
+    Read non-empty lines of a username file
+    
+    Args:
+        path: Path to a text file with one username per line
+        
+    Returns:
+        list: Usernames in file order
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        return [line.strip() for line in file if line.strip()]
+
+def collect_new_usernames(state, input_mtimes, known_users=None, rejected=None):
+    """
+    Pick up usernames from the input file (when it changed) and the queue directory
+    
+    Files dropped into DAEMON_QUEUE_DIR are consumed: their usernames are added
+    to the state and the file is removed.
+    
+    Args:
+        state: Daemon state, updated in place with new usernames
+        input_mtimes: Dict of path -> last seen mtime, updated in place
+        known_users: Lowercase usernames known to be users/bots (for triage)
+        rejected: Raw usernames already skipped by triage, updated in place
+        
+    Returns:
+        int: Number of usernames added to the watch list
+    """
+    added = 0
+    rejected = set() if rejected is None else rejected
+    
+    def add(usernames):
+        nonlocal added
+        watched = {normalize_username(username).lower() for username in state}
+        
+        # Re-read files repeat old entries; only new ones go through triage
+        fresh = [
+            username for username in usernames
+            if username not in rejected and normalize_username(username).lower() not in watched
+        ]
+        if not fresh:
+            return
+        
+        if TRIAGE_USERNAMES:
+            accepted, skipped = triage_usernames(fresh, known_users, watched)
+            if skipped:
+                print_report(len(fresh), len(accepted), count_reasons(skipped))
+            
+            # Duplicates are already watched; only real rejects are remembered and saved
+            rejects = [(raw, reason) for raw, reason in skipped if reason != 'duplicate']
+            rejected.update(raw for raw, _ in rejects)
+            save_skipped(rejects, SKIPPED_FILE, append=True)
+        else:
+            accepted = fresh
+        
+        for username in accepted:
+            if username not in state:
+                state[username] = None
+                added += 1
+    
+    # Re-read the main input file only when it was modified
+    if os.path.exists(INPUT_FILE):
+        mtime = os.path.getmtime(INPUT_FILE)
+        if input_mtimes.get(INPUT_FILE) != mtime:
+            try:
+                add(read_usernames(INPUT_FILE))
+                input_mtimes[INPUT_FILE] = mtime
+            except Exception as e:
+                print(f"Error reading input file: {str(e)}")
+    
+    # Consume files from the queue directory
+    if os.path.isdir(DAEMON_QUEUE_DIR):
+        for name in sorted(os.listdir(DAEMON_QUEUE_DIR)):
+            path = os.path.join(DAEMON_QUEUE_DIR, name)
+            if not name.endswith('.txt') or not os.path.isfile(path):
+                continue
+            try:
+                add(read_usernames(path))
+                os.remove(path)
+            except Exception as e:
+                print(f"Error reading queue file {path}: {str(e)}")
+    
+    return added
+
+def load_dead_channels():
+    """
+    Find channels whose latest row in OUTPUT_FILE is private or nonexistent
+    
+    Returns:
+        set: Lowercase usernames without @
+    """
+    latest = {}
+    if not os.path.exists(OUTPUT_FILE):
+        return set()
+    
+    try:
+        with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
+            for row in csv.reader(f):
+                if len(row) >= 2:
+                    latest[normalize_username(row[0]).lower()] = row[1]
+    except Exception as e:
+        print(f"Error reading {OUTPUT_FILE}: {str(e)}")
+    
+    return {key for key, status in latest.items() if status in PERMANENT_RESULTS}
+
+def get_stale_usernames(state, refresh_interval, dead=None):
+    """
+    Get usernames whose data is missing or older than the refresh interval
+    
+    Args:
+        state: Daemon state
+        refresh_interval: Seconds after which channel data is stale
+        dead: Lowercase usernames of private/nonexistent channels, re-checked
+            only after DEAD_CHANNEL_BACKOFF
+        
+    Returns:
+        list: Usernames due for scraping, never-scraped and oldest first
+    """
+    dead = dead or set()
+    now = datetime.now()
+    stale_before = now - timedelta(seconds=refresh_interval)
+    dead_before = now - timedelta(seconds=max(refresh_interval, DEAD_CHANNEL_BACKOFF))
+    due = [
+        (last_scraped or '', username) for username, last_scraped in state.items()
+        if not last_scraped or datetime.fromisoformat(last_scraped) < (
+            dead_before if normalize_username(username).lower() in dead else stale_before
+        )
+    ]
+    return [username for _, username in sorted(due)]
+
+async def run_daemon(refresh_interval=REFRESH_INTERVAL, watch_interval=WATCH_INTERVAL):
+    """
+    Keep clients connected and continuously re-scrape channels as they go stale
+    
+    Watches INPUT_FILE and DAEMON_QUEUE_DIR for new usernames and re-scrapes
+    every known channel once its data is older than refresh_interval.
+    Results are appended to OUTPUT_FILE, so the latest row for a channel wins.
+    
+    Args:
+        refresh_interval: Seconds after which channel data is re-scraped
+        watch_interval: Seconds to sleep between input checks when idle
+    """
+    if not os.path.exists(SESSIONS_INFO_FILE):
+        print("Error: No sessions found. Please run create_sessions.py first.")
+        return
+    
+    sessions_info = load_sessions_info()
+    if sessions_info is None or not check_api_credentials(sessions_info):
+        return
+    
+    os.makedirs(DAEMON_QUEUE_DIR, exist_ok=True)
+    
+    state = load_daemon_state()
+    input_mtimes = {}
+    known_users = load_known_users(OUTPUT_FILE)
+    dead = load_dead_channels()
+    rejected = set()
+    
+    # Handles that turned out to be users or bots are never channels
+    for username in [username for username in state if normalize_username(username).lower() in known_users]:
+        del state[username]
+        rejected.add(username)
+    
+    clients = {}
+    flusher = start_session_flusher(clients, sessions_info)
+    hedger = create_hedger(sessions_info, clients)
+    store = TimestampStore() if STORE_TIMESTAMPS else None
+    # The daemon never exits on its own: write the trace in chunks instead of only at exit
+    tracer = asyncio.create_task(profiler.rotate_trace_periodically(PROFILE_TRACE_FILE)) if profiler.is_enabled() else None
+    active_session = None
+    client = None
+    
+    # Scrape times are written at most every DAEMON_STATE_FLUSH_INTERVAL seconds,
+    # not after every channel; a crash only repeats the last few scrapes.
+    # New usernames are saved at once: consumed queue files are already gone
+    state_dirty = False
+    state_saved_at = time.monotonic()
+    
+    def flush_state():
+        nonlocal state_dirty, state_saved_at
+        save_daemon_state(state)
+        state_dirty = False
+        state_saved_at = time.monotonic()
+    
+    print(f"Daemon started. Watching {INPUT_FILE} and {DAEMON_QUEUE_DIR}/ "
+          f"(refresh every {refresh_interval}s)")
+    
+    try:
+        with open_output_file() as csvfile:
+            writer = csv.writer(csvfile)
+            
+            while True:
+                added = collect_new_usernames(state, input_mtimes, known_users, rejected)
+                if added:
+                    print(f"Added {added} new usernames (watching {len(state)})")
+                    flush_state()
+                
+                due = get_stale_usernames(state, refresh_interval, dead)
+                
+                for username in due:
+                    # (Re)acquire a session when we have none or it was lost
+                    if client is None or not client.is_connected():
+                        active_session = await get_available_session(sessions_info)
+                        if not active_session:
+                            print("No available sessions. Waiting...")
+                            break
+                        try:
+                            client = await start_client(active_session, clients)
+                        except Exception as e:
+                            print(f"Error starting client: {str(e)}")
+                            client = None
+                            break
+                        print(f"Using session: {active_session['session_name']}")
+                    
+                    active_session, client = await rebalance_session(active_session, client, sessions_info, clients)
+                    
+                    results = []
+                    with profiler.span('channel', channel=username):
+                        success, new_session, new_client = await process_channel(
+                            client, username, active_session, sessions_info, writer, clients,
+                            hedger=hedger, store=store, results=results
+                        )
+                    
+                    if new_session and new_client:
+                        active_session = new_session
+                        client = new_client
+                    
+                    if not success:
+                        client = None
+                        break
+                    
+                    csvfile.flush()
+                    status = str(results[-1][0]) if results else ''
+                    key = normalize_username(username).lower()
+                    
+                    if any(marker in status for marker in USER_ERROR_MARKERS):
+                        # A user or bot: stop watching it and let triage drop it from now on
+                        print(f"{username} is not a channel, no longer watched")
+                        known_users.add(key)
+                        rejected.add(username)
+                        del state[username]
+                    else:
+                        state[username] = datetime.now().isoformat()
+                        if status in PERMANENT_RESULTS:
+                            dead.add(key)
+                        else:
+                            dead.discard(key)
+                    state_dirty = True
+                    
+                    # Pick up new input between channels, not only between passes
+                    if collect_new_usernames(state, input_mtimes, known_users, rejected):
+                        flush_state()
+                    elif time.monotonic() - state_saved_at >= DAEMON_STATE_FLUSH_INTERVAL:
+                        flush_state()
+                
+                if state_dirty:
+                    flush_state()
+                
+                await asyncio.sleep(watch_interval)
+    
+    finally:
+        if flusher:
+            flusher.cancel()
+        if tracer:
+            tracer.cancel()
+        if hedger:
+            hedger.print_stats()
+        save_daemon_state(state)
+        SESSIONS_STATE.flush(sessions_info)
+        await disconnect_clients(clients)
+
+def read_scraped_usernames():
+    """
+    Get usernames that already have a row in OUTPUT_FILE
+    
+    Returns:
+        list: Usernames from the first column
+    """
+    if not os.path.exists(OUTPUT_FILE):
+        return []
+    
+    with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return [row[0] for row in reader if row]
+
+async def crawl(max_depth=CRAWL_DEPTH, budget=CRAWL_BUDGET):
+    """
+    Snowball crawl: scrape seed channels and follow handles from their descriptions
+    
+    Seeds are read from INPUT_FILE. Every @username and t.me link found in a
+    scraped description is queued at depth + 1 unless it was already seen,
+    including channels scraped in earlier runs. Discovered handles are logged
+    to CRAWL_LOG_FILE with the channel they were found in.
+    
+    Args:
+        max_depth: Maximum number of hops from the seeds
+        budget: Maximum number of channels to scrape
+    """
+    if not os.path.exists(SESSIONS_INFO_FILE):
+        print("Error: No sessions found. Please run create_sessions.py first.")
+        return
+    
+    sessions_info = load_sessions_info()
+    if sessions_info is None or not check_api_credentials(sessions_info):
+        return
+    
+    try:
+        seeds = read_usernames(INPUT_FILE)
+    except Exception as e:
+        print(f"Error reading input file: {str(e)}")
+        return
+    
+    known_users = load_known_users(OUTPUT_FILE)
+    if TRIAGE_USERNAMES:
+        total_input = len(seeds)
+        seeds, skipped = triage_usernames(seeds, known_users)
+        save_skipped(skipped, SKIPPED_FILE)
+        print_report(total_input, len(seeds), count_reasons(skipped))
+    
+    # Seeds are always scraped; anything scraped before is not re-queued
+    frontier = CrawlFrontier(max_depth, budget)
+    frontier.push(seeds, 0)
+    frontier.mark_seen(read_scraped_usernames())
+    
+    active_session = await get_available_session(sessions_info)
+    if not active_session:
+        print("No available sessions. Please create sessions using create_sessions.py")
+        return
+    
+    print(f"Using session: {active_session['session_name']}")
+    print(f"Crawling from {len(frontier)} seeds (depth {max_depth}, budget {budget})")
+    
+    clients = {}
+    flusher = start_session_flusher(clients, sessions_info)
+    hedger = create_hedger(sessions_info, clients)
+    store = TimestampStore() if STORE_TIMESTAMPS else None
+    scraped = 0
+    try:
+        try:
+            client = await start_client(active_session, clients)
+        except UpdateAppToLoginError:
+            print("\nError: Telethon version is outdated for this API request.")
+            print("Try updating Telethon: pip install --upgrade telethon")
             return
+        
+        log_exists = os.path.exists(CRAWL_LOG_FILE) and os.path.getsize(CRAWL_LOG_FILE) > 0
+        with open_output_file() as csvfile, open(CRAWL_LOG_FILE, 'a', newline='', encoding='utf-8') as logfile:
+            writer = csv.writer(csvfile)
+            log_writer = csv.writer(logfile)
+            if not log_exists:
+                log_writer.writerow(['Юзернейм', 'Глубина', 'Найден в'])
+            
+            while True:
+                item = frontier.pop()
+                if item is None:
+                    break
+                username, depth = item
+                print(f"Crawling [depth {depth}, {len(frontier)} queued]: {username}")
+                
+                active_session, client = await rebalance_session(active_session, client, sessions_info, clients)
+                
+                discovered = []
+                with profiler.span('channel', channel=username):
+                    success, new_session, new_client = await process_channel(
+                        client, username, active_session, sessions_info, writer, clients, discovered, hedger, store
+                    )
+                
+                if new_session and new_client:
+                    active_session = new_session
+                    client = new_client
+                
+                if not success:
+                    print("Stopping crawl: no session could process the channel.")
+                    break
+                
+                scraped += 1
+                
+                if TRIAGE_USERNAMES:
+                    discovered, _ = triage_usernames(discovered, known_users)
+                
+                for found in frontier.push(discovered, depth + 1):
+                    log_writer.writerow([found, depth + 1, username])
+                logfile.flush()
+        
+        print(f"Crawl finished: {scraped} channels scraped, {frontier.scheduled - scraped} left in frontier. "
+              f"Results saved to {OUTPUT_FILE}, discovered handles to {CRAWL_LOG_FILE}")
+    
+    finally:
+        if flusher:
+            flusher.cancel()
+        if hedger:
+            hedger.print_stats()
+        SESSIONS_STATE.flush(sessions_info)
+        await disconnect_clients(clients)
+
+async def main():
+    """
+    Main function to process all channels and save results to CSV
+    
+    Returns:
+        str: The last username being processed or None
+    """
+    # Check if sessions are available
+    if not os.path.exists(SESSIONS_INFO_FILE):
+        print("Error: No sessions found. Please run create_sessions.py first.")
+        return
+    
+    sessions_info = load_sessions_info()
+    if sessions_info is None or not check_api_credentials(sessions_info):
+        return
     
     # Get an available session
     active_session = await get_available_session(sessions_info)
@@ -411,91 +1212,111 @@ async def main():
     
     print(f"Using session: {active_session['session_name']}")
     
-    client = None
+    clients = {}
+    flusher = start_session_flusher(clients, sessions_info)
+    hedger = create_hedger(sessions_info, clients)
+    store = TimestampStore() if STORE_TIMESTAMPS else None
     try:
         # Create client with the selected session
-        session_path = os.path.join(SESSIONS_DIR, active_session['session_name'])
-        client = TelegramClient(session_path, int(API_ID), API_HASH, system_version="4.16.30-vxCUSTOM")
-        
         try:
-            await client.start()
+            client = await start_client(active_session, clients)
         except UpdateAppToLoginError:
             print("\nError: Telethon version is outdated for this API request.")
             print("Try updating Telethon: pip install --upgrade telethon")
             return
         
-        # Read usernames from input file
-        usernames = []
-        try:
-            with open(INPUT_FILE, 'r', encoding='utf-8') as file:
-                usernames = [line.strip() for line in file if line.strip()]
-        except Exception as e:
-            print(f"Error reading input file: {str(e)}")
+        if not os.path.exists(INPUT_FILE):
+            print(f"Error reading input file: {INPUT_FILE} not found")
             return
         
         # Load progress to determine where to start
-        progress = load_progress()
-        start_index = 0
-        
-        if progress and progress['last_username'] in usernames:
-            last_index = usernames.index(progress['last_username'])
-            
-            # If last channel was processed successfully, start from next one
-            if progress['is_processed']:
-                start_index = last_index + 1
-            else:
-                # If last channel wasn't processed successfully, retry it
-                start_index = last_index
-                
-            print(f"Resuming from index {start_index} (username: {usernames[start_index]})")
+        start_offset = find_resume_offset(load_progress())
+        input_size = os.path.getsize(INPUT_FILE)
         
         # Check if we've already processed all channels
-        if start_index >= len(usernames):
+        if start_offset >= input_size:
             print("All channels have been processed.")
             return
         
-        # Create Results directory if it doesn't exist
-        os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+        if start_offset:
+            print(f"Resuming from byte {start_offset} of {input_size}")
+        
+        known_users = load_known_users(OUTPUT_FILE) if TRIAGE_USERNAMES else None
+        # Duplicates are tracked in a Bloom filter (~2 bytes per username instead
+        # of a set entry); its hits are saved to SKIPPED_FILE as 'probable_duplicate',
+        # ~0.1% of them are false positives. Sized for one username per ~10 bytes of input
+        seen = BloomFilter(max(FRONTIER_CAPACITY, input_size // 10))
+        # A resumed run must not repeat channels committed before start_offset
+        if start_offset:
+            for username in read_scraped_usernames():
+                seen.add(normalize_username(username).lower())
+        skipped_buffer = []
+        reason_counts = {}
+        total_input = accepted_count = 0
         
-        # Check if output file exists and has header
-        file_exists = os.path.exists(OUTPUT_FILE) and os.path.getsize(OUTPUT_FILE) > 0
+        # A fresh run rewrites the skipped list, a resumed one extends it
+        if TRIAGE_USERNAMES and not start_offset:
+            save_skipped([], SKIPPED_FILE)
         
         # Open CSV file in append mode if resuming
-        with open(OUTPUT_FILE, 'a' if file_exists else 'w', newline='', encoding='utf-8') as csvfile:
+        with open_output_file() as csvfile:
             writer = csv.writer(csvfile)
-            
-            # Write header if file is new
-            if not file_exists:
-                writer.writerow(['Юзернейм канала', 'Дата последнего поста', 'Количество постов за неделю', 'Юзернейм из описания'])
-            
-            # Process each username from the starting point
-            total = len(usernames)
-            i = start_index
             current_username = None
             
-            while i < total:
-                current_username = usernames[i]
-                print(f"Processing {i+1}/{total}: {current_username}")
+            # Usernames are read lazily, so huge inputs start at once without loading the file
+            for raw_username, line_offset, next_offset in stream_usernames(INPUT_FILE, start_offset):
+                total_input += 1
                 
-                # Save that we're starting to process this username
-                save_progress(current_username, False)
+                # Drop usernames that would only waste API calls
+                if TRIAGE_USERNAMES:
+                    accepted, skipped = triage_usernames([raw_username], known_users, seen)
+                    if skipped:
+                        skipped_buffer.extend(skipped)
+                        count_reasons(skipped, reason_counts)
+                        if len(skipped_buffer) >= 1000:
+                            save_skipped(skipped_buffer, SKIPPED_FILE, append=True)
+                            skipped_buffer = []
+                        continue
+                    current_username = accepted[0]
+                else:
+                    current_username = raw_username
                 
-                success, new_session, new_client = await process_channel(
-                    client, current_username, active_session, sessions_info, writer
-                )
+                accepted_count += 1
+                print(f"Processing {current_username} ({next_offset * 100 // input_size}% of input)")
                 
-                # If session was switched, update our references
-                if new_session and new_client:
-                    # Close the old client
-                    await client.disconnect()
+                # Save that we're starting to process this username;
+                # lines skipped before it will not be read again after a resume
+                with profiler.span('progress_write', channel=current_username):
+                    if skipped_buffer:
+                        save_skipped(skipped_buffer, SKIPPED_FILE, append=True)
+                        skipped_buffer = []
+                    save_progress(current_username, False, line_offset)
+                
+                active_session, client = await rebalance_session(active_session, client, sessions_info, clients)
+                
+                # Retry the channel until it is processed
+                success = False
+                while not success:
+                    with profiler.span('channel', channel=current_username):
+                        success, new_session, new_client = await process_channel(
+                            client, current_username, active_session, sessions_info, writer, clients,
+                            hedger=hedger, store=store
+                        )
                     
-                    # Update to the new session and client
-                    active_session = new_session
-                    client = new_client
+                    # If session was switched, update our references
+                    if new_session and new_client:
+                        # Update to the new session and client
+                        active_session = new_session
+                        client = new_client
                 
-                # Only increment if successful
-                if success:
-                    i += 1
+                # Checkpoint the committed position
+                csvfile.flush()
+                with profiler.span('progress_write', channel=current_username):
+                    save_progress(current_username, True, line_offset)
+        
+        if TRIAGE_USERNAMES:
+            save_skipped(skipped_buffer, SKIPPED_FILE, append=True)
+            print_report(total_input, accepted_count, reason_counts)
         
         print(f"Completed! Results saved to {OUTPUT_FILE}")
         return current_username
@@ -505,14 +1326,71 @@ async def main():
         return current_username if 'current_username' in locals() else None
     
     finally:
-        # Ensure client is disconnected if it exists and is connected
-        if client and client.is_connected():
-            await client.disconnect()
+        # Ensure all clients are disconnected
+        if flusher:
+            flusher.cancel()
+        if hedger:
+            hedger.print_stats()
+        SESSIONS_STATE.flush(sessions_info)
+        await disconnect_clients(clients)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Telegram channel scraper")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Keep clients connected and re-scrape channels as their data goes stale")
+    parser.add_argument('--refresh-interval', type=int, default=REFRESH_INTERVAL,
+                        help="Daemon: seconds after which channel data is re-scraped")
+    parser.add_argument('--watch-interval', type=int, default=WATCH_INTERVAL,
+                        help="Daemon: seconds between input checks when idle")
+    parser.add_argument('--memory-sessions', action='store_true',
+                        help="Keep sessions in memory and flush them to disk periodically and at shutdown")
+    parser.add_argument('--session-flush-interval', type=int, default=SESSION_FLUSH_INTERVAL,
+                        help="Seconds between flushes of in-memory sessions and sessions_info.json")
+    parser.add_argument('--crawl', action='store_true',
+                        help="Follow @usernames and t.me links from descriptions of the input channels")
+    parser.add_argument('--crawl-depth', type=int, default=CRAWL_DEPTH,
+                        help="Crawl: maximum number of hops from the input channels")
+    parser.add_argument('--crawl-budget', type=int, default=CRAWL_BUDGET,
+                        help="Crawl: maximum number of channels to scrape")
+    parser.add_argument('--hedge', action='store_true',
+                        help="Repeat requests slower than the observed p95 on another idle session")
+    parser.add_argument('--hedge-budget', type=float, default=HEDGE_BUDGET,
+                        help="Maximum share of requests that may be hedged")
+    parser.add_argument('--store-timestamps', action='store_true',
+                        help="Keep dates and ids of fetched posts for timestamp_store.py metrics")
+    parser.add_argument('--no-triage', action='store_true',
+                        help="Send every input line to the API without username validation and deduplication")
+    parser.add_argument('--profile', nargs='?', const=PROFILE_TRACE_FILE, metavar='TRACE_FILE',
+                        help=f"Record per-phase spans as Chrome trace-event JSON (default: {PROFILE_TRACE_FILE})")
+    parser.add_argument('--cprofile', metavar='STATS_FILE',
+                        help="Also dump cProfile stats of the run to this file (requires --profile)")
+    args = parser.parse_args()
+    if args.cprofile and not args.profile:
+        parser.error("--cprofile requires --profile")
+    
+    MEMORY_SESSIONS = MEMORY_SESSIONS or args.memory_sessions
+    SESSION_FLUSH_INTERVAL = args.session_flush_interval
+    TRIAGE_USERNAMES = not args.no_triage
+    HEDGE_REQUESTS = args.hedge
+    HEDGE_BUDGET = args.hedge_budget
+    STORE_TIMESTAMPS = args.store_timestamps
+    
+    profile = None
+    if args.profile:
+        PROFILE_TRACE_FILE = args.profile
+        profiler.enable()
+        if args.cprofile:
+            profile = cProfile.Profile()
+            profile.enable()
+    
     current_username = None
     try:
-        current_username = asyncio.run(main())
+        if args.daemon:
+            asyncio.run(run_daemon(args.refresh_interval, args.watch_interval))
+        elif args.crawl:
+            asyncio.run(crawl(args.crawl_depth, args.crawl_budget))
+        else:
+            current_username = asyncio.run(main())
     except KeyboardInterrupt:
         print("\nOperation cancelled by user.")
         # Even when cancelled, save progress if we know the current username
@@ -520,4 +1398,13 @@ if __name__ == "__main__":
             save_progress(current_username, False)
             print(f"Progress saved. Resume from {current_username}")
     except Exception as e:
-        print(f"\nUnhandled error: {str(e)}")
\ No newline at end of file
+        print(f"\nUnhandled error: {str(e)}")
+    finally:
+        if args.profile:
+            if profile:
+                profile.disable()
+                profile.dump_stats(args.cprofile)
+                print(f"cProfile stats saved to {args.cprofile}")
+            profiler.write_trace(args.profile)
+            profiler.print_summary()
+        print_group_stats()
\ No newline at end of file
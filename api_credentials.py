@@ -0,0 +1,180 @@
+import os
+import random
+import time
+from collections import deque
+
+DEFAULT_GROUP = 'default'
+
+# Observed load per credential group: group -> {'requests': n, 'flood_waits': n, 'flood_seconds': s}
+GROUP_STATS = {}
+
+# Flood waits are temporary, so session choice only looks at the last
+# FLOOD_RATE_WINDOW seconds: group -> {'requests': deque of times, 'flood_waits': deque of (time, seconds)}
+FLOOD_RATE_WINDOW = 30 * 60
+RECENT_EVENTS = {}
+
+def get_api_credentials(session):
+    """
+    Resolve the API credentials of a session
+
+    A session entry in sessions_info.json may carry its own "api_id"/"api_hash",
+    or an "api_group" that refers to TELEGRAM_API_ID_<GROUP>/TELEGRAM_API_HASH_<GROUP>
+    in .env. Otherwise the default TELEGRAM_API_ID/TELEGRAM_API_HASH pair is used.
+
+    Args:
+        session (dict): Session info
+
+    Returns:
+        Tuple of (api_id, api_hash, group) or (None, None, group) if not configured
+    """
+    if session.get('api_id') and session.get('api_hash'):
+        group = session.get('api_group') or str(session['api_id'])
+        return int(session['api_id']), session['api_hash'], group
+
+    group = session.get('api_group')
+    if group:
+        suffix = group.upper()
+        api_id = os.getenv(f'TELEGRAM_API_ID_{suffix}')
+        api_hash = os.getenv(f'TELEGRAM_API_HASH_{suffix}')
+    else:
+        group = DEFAULT_GROUP
+        api_id = os.getenv('TELEGRAM_API_ID')
+        api_hash = os.getenv('TELEGRAM_API_HASH')
+
+    if not api_id or not api_hash:
+        return None, None, group
+    return int(api_id), api_hash, group
+
+def get_session_group(session):
+    """
+    Args:
+        session (dict): Session info
+
+    Returns:
+        str: Name of the credential group the session belongs to
+    """
+    return get_api_credentials(session)[2]
+
+def missing_api_credentials(sessions_info):
+    """
+    Find sessions whose credentials are not configured
+
+    Args:
+        sessions_info (list): All sessions
+
+    Returns:
+        list: Names of sessions without usable credentials
+    """
+    return [
+        session['session_name'] for session in sessions_info
+        if get_api_credentials(session)[0] is None
+    ]
+
+def _group_stats(group):
+    return GROUP_STATS.setdefault(group, {'requests': 0, 'flood_waits': 0, 'flood_seconds': 0})
+
+def _recent_events(group):
+    return RECENT_EVENTS.setdefault(group, {'requests': deque(), 'flood_waits': deque()})
+
+def _prune(events, now):
+    cutoff = now - FLOOD_RATE_WINDOW
+    while events['requests'] and events['requests'][0] < cutoff:
+        events['requests'].popleft()
+    while events['flood_waits'] and events['flood_waits'][0][0] < cutoff:
+        events['flood_waits'].popleft()
+
+def record_request(session):
+    """
+    Count a processed channel for the session's credential group
+
+    Args:
+        session (dict): Session that processed the channel
+    """
+    group = get_session_group(session)
+    _group_stats(group)['requests'] += 1
+    _recent_events(group)['requests'].append(time.monotonic())
+
+def record_flood_wait(session, seconds):
+    """
+    Count a FloodWaitError for the session's credential group
+
+    Args:
+        session (dict): Session that hit the rate limit
+        seconds (int): Required wait time
+    """
+    group = get_session_group(session)
+    stats = _group_stats(group)
+    stats['flood_waits'] += 1
+    stats['flood_seconds'] += seconds
+    _recent_events(group)['flood_waits'].append((time.monotonic(), seconds))
+
+def flood_rate(group):
+    """
+    Flood-wait seconds per processed channel for a group over the last FLOOD_RATE_WINDOW
+
+    Groups without recent data get 0, so every group is tried before its rate
+    is known and a penalised group becomes eligible again once its flood
+    waits age out.
+
+    Args:
+        group (str): Credential group
+
+    Returns:
+        float: Average flood-wait seconds per request
+    """
+    events = RECENT_EVENTS.get(group)
+    if not events:
+        return 0.0
+    _prune(events, time.monotonic())
+    flood_seconds = sum(seconds for _, seconds in events['flood_waits'])
+    return flood_seconds / (len(events['requests']) + 1)
+
+def choose_session(candidates):
+    """
+    Pick a session from the credential group with the lowest flood-wait rate
+
+    Args:
+        candidates (list): Available sessions
+
+    Returns:
+        Session info or None if there are no candidates
+    """
+    if not candidates:
+        return None
+
+    rates = {}
+    for session in candidates:
+        group = get_session_group(session)
+        if group not in rates:
+            rates[group] = flood_rate(group)
+
+    best_rate = min(rates.values())
+    best_groups = [group for group, rate in rates.items() if rate == best_rate]
+    group = random.choice(best_groups)
+
+    return random.choice([session for session in candidates if get_session_group(session) == group])
+
+def choose_better_session(active_session, candidates):
+    """
+    Pick a session from a group with a lower flood-wait rate than the active one
+
+    Args:
+        active_session (dict): Session currently in use
+        candidates (list): Other available sessions
+
+    Returns:
+        Session info or None if no group does better than the active one
+    """
+    current_rate = flood_rate(get_session_group(active_session))
+    better = [session for session in candidates if flood_rate(get_session_group(session)) < current_rate]
+    return choose_session(better)
+
+def print_group_stats():
+    """Print observed load per credential group"""
+    if not GROUP_STATS:
+        return
+
+    print("\nCredential groups:")
+    for group, stats in sorted(GROUP_STATS.items()):
+        print(f"  {group}: {stats['requests']} channels, {stats['flood_waits']} flood waits "
+              f"({stats['flood_seconds']}s), {flood_rate(group):.2f}s/channel recently")
@@ -0,0 +1,110 @@
+import hashlib
+import math
+from collections import deque
+
+# Default sizing of the seen-filter: ~1.8 MB for a million handles at 0.1% false positives
+FRONTIER_CAPACITY = 1_000_000
+FRONTIER_ERROR_RATE = 0.001
+
+class BloomFilter:
+    """
+    Compact probabilistic set of strings
+
+    Never reports a present item as missing; reports a missing item as present
+    with probability error_rate once capacity items were added. For the crawl
+    this means a small share of new handles may be skipped, never re-scraped.
+    """
+
+    def __init__(self, capacity=FRONTIER_CAPACITY, error_rate=FRONTIER_ERROR_RATE):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        """
+        Add an item
+
+        Args:
+            item (str): Item to add
+
+        Returns:
+            bool: True if the item was not present before
+        """
+        added = False
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        return added
+
+    def __contains__(self, item):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(item))
+
+class CrawlFrontier:
+    """
+    Breadth-first queue of channels to scrape with depth and budget limits
+
+    Seeds have depth 0; handles found in a channel description get the
+    channel's depth + 1. Every handle is scheduled at most once.
+    """
+
+    def __init__(self, max_depth, budget, capacity=FRONTIER_CAPACITY):
+        self.max_depth = max_depth
+        self.budget = budget
+        self.queue = deque()
+        self.seen = BloomFilter(capacity)
+        self.scheduled = 0
+
+    def mark_seen(self, usernames):
+        """
+        Exclude usernames from scheduling (e.g. channels scraped in earlier runs)
+
+        Args:
+            usernames (iterable): Usernames with or without @
+        """
+        for username in usernames:
+            self.seen.add(username.lstrip('@').lower())
+
+    def push(self, usernames, depth):
+        """
+        Schedule unseen usernames at the given depth
+
+        Args:
+            usernames (iterable): Usernames with @
+            depth (int): Crawl depth of these usernames
+
+        Returns:
+            list: Usernames that were scheduled
+        """
+        if depth > self.max_depth:
+            return []
+
+        scheduled = []
+        for username in usernames:
+            if self.budget is not None and self.scheduled >= self.budget:
+                break
+            if self.seen.add(username.lstrip('@').lower()):
+                self.queue.append((username, depth))
+                self.scheduled += 1
+                scheduled.append(username)
+        return scheduled
+
+    def pop(self):
+        """
+        Get the next channel to scrape
+
+        Returns:
+            Tuple of (username, depth) or None if the frontier is empty
+        """
+        return self.queue.popleft() if self.queue else None
+
+    def __len__(self):
+        return len(self.queue)
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from collections import deque
+
+# Maximum share of requests that may be duplicated on another session
+HEDGE_BUDGET = 0.05
+# Latency samples per request kind needed before p95 is trusted
+HEDGE_MIN_SAMPLES = 20
+# Never hedge sooner than this many seconds
+HEDGE_MIN_DELAY = 2.0
+# Hedge delay while there are not enough samples yet
+HEDGE_DEFAULT_DELAY = 10.0
+# Latency samples kept per request kind
+HEDGE_WINDOW = 200
+
+class Hedger:
+    """
+    Duplicates slow requests on another session and keeps the first response
+
+    For every request kind the recent latencies are tracked; once a request
+    runs longer than their p95, the same request is started on a backup client
+    and whichever finishes first with a result wins, the other is cancelled.
+    Hedges are capped at budget * requests so they cannot eat the rate limits.
+    """
+
+    def __init__(self, get_backup_client, budget=HEDGE_BUDGET):
+        """
+        Args:
+            get_backup_client: Coroutine function (primary_client) -> idle client or None.
+                Should return quickly with an already connected client; it runs
+                concurrently with the slow primary request
+            budget: Maximum share of requests that may be hedged
+        """
+        self.get_backup_client = get_backup_client
+        self.budget = budget
+        self.latencies = {}
+        self.requests = 0
+        self.hedges = 0
+        self.backup_wins = 0
+
+    def threshold(self, kind):
+        """
+        Seconds to wait for a request before hedging it
+
+        Args:
+            kind (str): Request kind
+
+        Returns:
+            float: p95 of recent latencies (bounded below), or the default delay
+        """
+        samples = self.latencies.get(kind)
+        if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return max(HEDGE_MIN_DELAY, p95)
+
+    def _record(self, kind, seconds):
+        self.latencies.setdefault(kind, deque(maxlen=HEDGE_WINDOW)).append(seconds)
+
+    def _can_hedge(self):
+        return self.hedges + 1 <= max(1, self.budget * self.requests)
+
+    async def call(self, kind, client, primary, backup):
+        """
+        Run a request, hedging it on another session if it is slow
+
+        Args:
+            kind (str): Request kind, latencies are tracked per kind
+            client: Primary Telegram client
+            primary: Coroutine function (client) -> result, run on the primary client
+            backup: Coroutine function (client) -> result, run on the backup client.
+                Must not use entities resolved by the primary client, their
+                access hashes are only valid for that account.
+
+        Returns:
+            Result of whichever request succeeded first
+        """
+        self.requests += 1
+        start = time.monotonic()
+        primary_task = asyncio.ensure_future(primary(client))
+        # The primary's own latency, whatever the hedge does; a cancelled
+        # primary records a lower bound
+        primary_task.add_done_callback(lambda _: self._record(kind, time.monotonic() - start))
+
+        done, _ = await asyncio.wait({primary_task}, timeout=self.threshold(kind))
+        if done or not self._can_hedge():
+            return await primary_task
+
+        # Getting a backup client races the primary instead of blocking it
+        acquire_task = asyncio.ensure_future(self.get_backup_client(client))
+        backup_task = None
+        pending = {primary_task, acquire_task}
+
+        try:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if primary_task in done:
+                return primary_task.result()
+
+            backup_client = acquire_task.result()
+            if backup_client is None:
+                return await primary_task
+
+            self.hedges += 1
+            backup_task = asyncio.ensure_future(backup(backup_client))
+            pending = {primary_task, backup_task}
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup_task:
+                            self.backup_wins += 1
+                        return task.result()
+
+            # Both failed: report the primary error as without hedging
+            return primary_task.result()
+
+        finally:
+            pending = [task for task in (primary_task, acquire_task, backup_task) if task is not None and not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def print_stats(self):
+        """Print how many requests were hedged and how many hedges won"""
+        print(f"\nHedging: {self.hedges} of {self.requests} requests hedged, "
+              f"{self.backup_wins} answered by the backup session")
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Spans kept in memory between trace writes; the oldest are dropped beyond this
+MAX_SPANS = 200_000
+# Seconds between trace chunk writes of a long-running process (daemon mode)
+TRACE_ROTATE_INTERVAL = 10 * 60
+
+# Recorded spans: (name, start_ns, duration_ns, tid, args)
+_spans = deque(maxlen=MAX_SPANS)
+_dropped = 0
+# Per-phase (count, total_ns) over the whole run, kept when spans are rotated out
+_totals = {}
+_chunks = 0
+_enabled = False
+_start_ns = None
+_tids = {}
+
+def enable():
+    """Start recording spans"""
+    global _enabled, _start_ns
+    _enabled = True
+    _start_ns = time.perf_counter_ns()
+
+def is_enabled():
+    return _enabled
+
+def _current_tid():
+    # Spans of concurrent tasks must not interleave on one track,
+    # so each asyncio task (or thread outside a loop) gets its own tid
+    try:
+        key = id(asyncio.current_task())
+    except RuntimeError:
+        key = threading.get_ident()
+    return _tids.setdefault(key, len(_tids) + 1)
+
+@contextmanager
+def span(name, **args):
+    """
+    Record the duration of a block as a named phase
+
+    Does nothing unless profiling was enabled.
+
+    Args:
+        name (str): Phase name
+        **args: Extra values shown in the trace viewer (e.g. channel=...)
+    """
+    if not _enabled:
+        yield
+        return
+
+    global _dropped
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter_ns() - start
+        count, total = _totals.get(name, (0, 0))
+        _totals[name] = (count + 1, total + duration)
+        if len(_spans) == _spans.maxlen:
+            _dropped += 1
+        _spans.append((name, start, duration, _current_tid(), args))
+
+def write_trace(path):
+    """
+    Write buffered spans in Chrome trace-event JSON (chrome://tracing, Perfetto)
+
+    If earlier spans were rotated out by rotate_trace(), the file holds only
+    the spans recorded since the last chunk.
+
+    Args:
+        path (str): Output file path
+    """
+    global _dropped
+    events = [
+        {
+            'name': name,
+            'cat': 'tg_parser',
+            'ph': 'X',
+            'ts': (start - _start_ns) / 1000,
+            'dur': duration / 1000,
+            'pid': os.getpid(),
+            'tid': tid,
+            'args': args
+        }
+        for name, start, duration, tid, args in _spans
+    ]
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+    print(f"Trace with {len(events)} spans saved to {path}")
+    if _dropped:
+        print(f"{_dropped} older spans were dropped (buffer limit {MAX_SPANS})")
+        _dropped = 0
+
+def rotate_trace(path):
+    """
+    Write buffered spans to the next numbered chunk next to path and clear the buffer
+
+    Chunks are named like trace.0001.json for path trace.json.
+
+    Args:
+        path (str): Trace file path of the run
+
+    Returns:
+        str or None: Chunk path, None if there was nothing to write
+    """
+    global _chunks
+    if not _spans:
+        return None
+
+    _chunks += 1
+    root, ext = os.path.splitext(path)
+    chunk_path = f"{root}.{_chunks:04d}{ext or '.json'}"
+    write_trace(chunk_path)
+    _spans.clear()
+    return chunk_path
+
+async def rotate_trace_periodically(path, interval=TRACE_ROTATE_INTERVAL):
+    """
+    Background task: bound memory of long runs and keep the trace on disk
+
+    Args:
+        path (str): Trace file path of the run
+        interval (int): Seconds between chunks
+    """
+    while True:
+        await asyncio.sleep(interval)
+        rotate_trace(path)
+
+def print_summary():
+    """Print time spent per phase over the whole run"""
+    if not _totals:
+        print("No spans recorded.")
+        return
+
+    wall = (time.perf_counter_ns() - _start_ns) / 1e9
+    totals = _totals
+
+    print(f"\nProfile summary (wall time {wall:.2f}s)")
+    print(f"{'Phase':<20}{'Count':>8}{'Total, s':>12}{'Mean, ms':>12}{'% wall':>9}")
+    for name, (count, total) in sorted(totals.items(), key=lambda item: -item[1][1]):
+        total_s = total / 1e9
+        print(f"{name:<20}{count:>8}{total_s:>12.2f}{total_s * 1000 / count:>12.1f}{total_s * 100 / wall:>8.1f}%")
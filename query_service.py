@@ -0,0 +1,374 @@
+import argparse
+import bisect
+import csv
+import io
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+# File paths
+TABLE_FILE = 'Results/Table.csv'
+
+# Server defaults
+HOST = '127.0.0.1'
+PORT = 8080
+DEFAULT_LIMIT = 100
+
+# Reloads with more new rows than this rebuild the sorted indexes instead of inserting one by one
+REBUILD_THRESHOLD = 1000
+
+def normalize_username(username):
+    """
+    Normalize a username for index lookups
+
+    Args:
+        username (str): Username with or without @
+
+    Returns:
+        str: Lowercase username without @
+    """
+    return username.strip().lstrip('@').lower()
+
+def parse_posts(value):
+    """
+    Parse the weekly posts column
+
+    Args:
+        value (str): Column value ('-' for unavailable channels)
+
+    Returns:
+        int or None: Number of posts or None if not a number
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_date(value):
+    """
+    Check that the last post column holds a YYYY-MM-DD date
+
+    Error rows store a message in this column instead of a date.
+    ISO dates compare correctly as strings, so the date is kept as a string.
+
+    Args:
+        value (str): Column value
+
+    Returns:
+        str or None: The date or None if the column does not hold a date
+    """
+    if value and len(value) == 10 and value[4] == '-' and value[7] == '-' and value.replace('-', '').isdigit():
+        return value
+    return None
+
+class ChannelIndex:
+    """
+    In-memory indexes over Table.csv
+
+    Keeps the latest row per channel keyed by normalized username, plus sorted
+    (value, username) lists for prefix, last post date and weekly posts range queries.
+    The CSV is append-only, so reload() only parses bytes added since the last load.
+    """
+
+    def __init__(self, path=TABLE_FILE):
+        self.path = path
+        self.lock = threading.RLock()
+        self.rows = {}
+        self.usernames = []
+        self.by_date = []
+        self.by_posts = []
+        self.offset = 0
+        self.inode = None
+
+    def reload(self):
+        """
+        Load rows appended since the previous call, or everything if the file was replaced
+
+        Returns:
+            int: Number of rows loaded
+        """
+        with self.lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return 0
+
+            # File was replaced or truncated: start over
+            if stat.st_ino != self.inode or stat.st_size < self.offset:
+                self.rows = {}
+                self.usernames = []
+                self.by_date = []
+                self.by_posts = []
+                self.offset = 0
+                self.inode = stat.st_ino
+
+            if stat.st_size == self.offset:
+                return 0
+
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                data = f.read()
+
+            # Only consume complete lines; a partially written row is read next time
+            end = data.rfind(b'\n') + 1
+            if end == 0:
+                return 0
+
+            lines = data[:end].decode('utf-8-sig' if self.offset == 0 else 'utf-8')
+            skip_header = self.offset == 0
+            self.offset += end
+
+            new_rows = []
+            for row in csv.reader(io.StringIO(lines)):
+                if skip_header:
+                    skip_header = False
+                    continue
+                if len(row) < 4 or not row[0]:
+                    continue
+                new_rows.append(row)
+
+            # insort is O(n) per row: a full load or a large tail is cheaper
+            # to apply to rows first and sort each index once
+            if len(new_rows) > REBUILD_THRESHOLD:
+                for row in new_rows:
+                    key, record = self._make_record(row)
+                    self.rows[key] = record
+                self._rebuild()
+            else:
+                for row in new_rows:
+                    self.add_row(row)
+
+            return len(new_rows)
+
+    def _rebuild(self):
+        self.usernames = sorted(self.rows)
+        self.by_date = sorted(
+            (record['last_post_date'], key) for key, record in self.rows.items()
+            if record['last_post_date'] is not None
+        )
+        self.by_posts = sorted(
+            (record['posts_last_week'], key) for key, record in self.rows.items()
+            if record['posts_last_week'] is not None
+        )
+
+    @staticmethod
+    def _make_record(row):
+        username, last_post_date, posts_last_week, description_username = row[:4]
+        date = parse_date(last_post_date)
+        return normalize_username(username), {
+            'username': username,
+            'last_post_date': date,
+            'posts_last_week': parse_posts(posts_last_week),
+            'description_username': None if description_username == '-' else description_username,
+            # Error rows ('Приватный канал', ...) keep their message here
+            'status': None if date or last_post_date == '-' else last_post_date
+        }
+
+    def add_row(self, row):
+        """
+        Add or replace a channel row in all indexes
+
+        Args:
+            row (list): CSV row [username, last_post_date, posts_last_week, description_username]
+        """
+        key, record = self._make_record(row)
+
+        old = self.rows.get(key)
+        if old:
+            self._remove_sorted(self.by_date, old['last_post_date'], key)
+            self._remove_sorted(self.by_posts, old['posts_last_week'], key)
+        else:
+            bisect.insort(self.usernames, key)
+
+        self.rows[key] = record
+
+        if record['last_post_date'] is not None:
+            bisect.insort(self.by_date, (record['last_post_date'], key))
+        if record['posts_last_week'] is not None:
+            bisect.insort(self.by_posts, (record['posts_last_week'], key))
+
+    @staticmethod
+    def _remove_sorted(index, value, key):
+        if value is None:
+            return
+        i = bisect.bisect_left(index, (value, key))
+        if i < len(index) and index[i] == (value, key):
+            del index[i]
+
+    def get(self, username):
+        """
+        Look up a single channel
+
+        Args:
+            username (str): Username with or without @, any case
+
+        Returns:
+            dict or None: Channel record
+        """
+        with self.lock:
+            return self.rows.get(normalize_username(username))
+
+    def query(self, prefix=None, date_from=None, date_to=None, min_posts=None, max_posts=None, limit=DEFAULT_LIMIT):
+        """
+        Range and prefix query over the indexes
+
+        The most selective index available drives the scan, other conditions are
+        checked per record.
+
+        Args:
+            prefix (str): Username prefix
+            date_from (str): Minimal last post date, YYYY-MM-DD inclusive
+            date_to (str): Maximal last post date, YYYY-MM-DD inclusive
+            min_posts (int): Minimal weekly posts, inclusive
+            max_posts (int): Maximal weekly posts, inclusive
+            limit (int): Maximal number of records to return, at least 1
+
+        Returns:
+            list: Matching channel records
+
+        Raises:
+            ValueError: If limit is below 1 or a date is not YYYY-MM-DD
+        """
+        if limit < 1:
+            raise ValueError('limit must be at least 1')
+        for name, value in (('date_from', date_from), ('date_to', date_to)):
+            if value is not None and parse_date(value) is None:
+                raise ValueError(f'{name} must be a YYYY-MM-DD date')
+
+        with self.lock:
+            if prefix:
+                prefix = normalize_username(prefix)
+                start = bisect.bisect_left(self.usernames, prefix)
+                keys = []
+                for key in self.usernames[start:]:
+                    if not key.startswith(prefix):
+                        break
+                    keys.append(key)
+            elif date_from or date_to:
+                keys = self._range(self.by_date, date_from, date_to, '')
+            elif min_posts is not None or max_posts is not None:
+                keys = self._range(self.by_posts, min_posts, max_posts, 0)
+            else:
+                keys = self.usernames
+
+            results = []
+            for key in keys:
+                record = self.rows[key]
+                date = record['last_post_date']
+                posts = record['posts_last_week']
+
+                if (date_from or date_to) and date is None:
+                    continue
+                if date_from and date < date_from:
+                    continue
+                if date_to and date > date_to:
+                    continue
+                if (min_posts is not None or max_posts is not None) and posts is None:
+                    continue
+                if min_posts is not None and posts < min_posts:
+                    continue
+                if max_posts is not None and posts > max_posts:
+                    continue
+
+                results.append(record)
+                if len(results) >= limit:
+                    break
+
+            return results
+
+    @staticmethod
+    def _range(index, low, high, lowest):
+        start = bisect.bisect_left(index, (low if low is not None else lowest,))
+        keys = []
+        for value, key in index[start:]:
+            if high is not None and value > high:
+                break
+            keys.append(key)
+        return keys
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    JSON API:
+        GET /channel/<username>
+        GET /channels?prefix=&date_from=&date_to=&min_posts=&max_posts=&limit=
+        GET /stats
+    """
+
+    index = None
+
+    def do_GET(self):
+        # Pick up newly appended rows before answering
+        self.index.reload()
+
+        url = urlparse(self.path)
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+
+        try:
+            if url.path.startswith('/channel/'):
+                record = self.index.get(unquote(url.path[len('/channel/'):]))
+                if record is None:
+                    self.send_json(404, {'error': 'Channel not found'})
+                else:
+                    self.send_json(200, record)
+
+            elif url.path == '/channels':
+                results = self.index.query(
+                    prefix=params.get('prefix'),
+                    date_from=params.get('date_from'),
+                    date_to=params.get('date_to'),
+                    min_posts=int(params['min_posts']) if 'min_posts' in params else None,
+                    max_posts=int(params['max_posts']) if 'max_posts' in params else None,
+                    limit=int(params.get('limit', DEFAULT_LIMIT))
+                )
+                self.send_json(200, {'count': len(results), 'channels': results})
+
+            elif url.path == '/stats':
+                self.send_json(200, {
+                    'channels': len(self.index.rows),
+                    'with_date': len(self.index.by_date),
+                    'with_posts': len(self.index.by_posts)
+                })
+
+            else:
+                self.send_json(404, {'error': 'Unknown endpoint'})
+
+        except ValueError as e:
+            self.send_json(400, {'error': f'Invalid parameter: {str(e)}'})
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Local JSON query service over scraped channel data")
+    parser.add_argument('--table', default=TABLE_FILE, help="Path to the scraped CSV table")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    args = parser.parse_args()
+
+    index = ChannelIndex(args.table)
+    loaded = index.reload()
+    print(f"Loaded {loaded} rows ({len(index.rows)} channels) from {args.table}")
+
+    QueryHandler.index = index
+    server = ThreadingHTTPServer((args.host, args.port), QueryHandler)
+    print(f"Serving on http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping server.")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
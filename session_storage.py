@@ -0,0 +1,243 @@
+import asyncio
+import json
+import os
+import sqlite3
+from telethon.sessions import MemorySession, SQLiteSession
+
+# Seconds between flushes of in-memory sessions (and sessions_info.json changes) to disk
+SESSION_FLUSH_INTERVAL = 60
+
+def fsync_path(path):
+    """
+    Flush a file, or a directory entry on POSIX, to stable storage
+
+    Renames are only durable once the file contents and the containing
+    directory are synced; directories cannot be opened for sync on Windows.
+
+    Args:
+        path: File or directory path
+    """
+    if os.path.isdir(path) and os.name == 'nt':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class PersistentMemorySession(MemorySession):
+    """
+    Telethon session kept in memory and flushed to a .session file on demand
+
+    The SQLite file is read once at startup. Entity and update state changes
+    only touch memory; persist() writes a complete copy to a temporary file
+    and atomically renames it over the original.
+    """
+
+    def __init__(self, session_path):
+        super().__init__()
+        self.filename = session_path if session_path.endswith('.session') else session_path + '.session'
+        self._dirty = False
+
+        if os.path.exists(self.filename):
+            self._load()
+
+    def _load(self):
+        stored = SQLiteSession(self.filename)
+        try:
+            if stored.server_address:
+                super().set_dc(stored.dc_id, stored.server_address, stored.port)
+            MemorySession.auth_key.fset(self, stored.auth_key)
+            MemorySession.takeout_id.fset(self, stored.takeout_id)
+            for entity_id, state in stored.get_update_states():
+                super().set_update_state(entity_id, state)
+        finally:
+            stored.close()
+
+        conn = sqlite3.connect(self.filename)
+        try:
+            self._entities = set(conn.execute('select id, hash, username, phone, name from entities'))
+        finally:
+            conn.close()
+
+    def set_dc(self, dc_id, server_address, port):
+        super().set_dc(dc_id, server_address, port)
+        self._dirty = True
+
+    @MemorySession.auth_key.setter
+    def auth_key(self, value):
+        MemorySession.auth_key.fset(self, value)
+        self._dirty = True
+
+    @MemorySession.takeout_id.setter
+    def takeout_id(self, value):
+        MemorySession.takeout_id.fset(self, value)
+        self._dirty = True
+
+    def set_update_state(self, entity_id, state):
+        super().set_update_state(entity_id, state)
+        self._dirty = True
+
+    def process_entities(self, tlo):
+        before = len(self._entities)
+        super().process_entities(tlo)
+        if len(self._entities) != before:
+            self._dirty = True
+
+    def save(self):
+        # Telethon calls save() after auth changes; disk writes are left to persist()
+        self._dirty = True
+
+    def close(self):
+        self.persist()
+
+    def persist(self, force=False):
+        """
+        Write the session to disk atomically (temp file + rename)
+
+        Args:
+            force: Write even if nothing changed since the last flush
+
+        Returns:
+            bool: Whether the file was written
+        """
+        if not self._dirty and not force:
+            return False
+
+        # SQLiteSession appends ".session" to names that don't end with it,
+        # so the staging file is renamed to tmp_filename once Telethon is done
+        tmp_filename = self.filename + '.tmp'
+        for path in (tmp_filename, tmp_filename + '.session', tmp_filename + '.session-journal'):
+            if os.path.exists(path):
+                os.remove(path)
+
+        stored = SQLiteSession(tmp_filename + '.session')
+        try:
+            if self.server_address:
+                stored.set_dc(self.dc_id, self.server_address, self.port)
+            stored.auth_key = self.auth_key
+            stored.takeout_id = self.takeout_id
+            for entity_id, state in self.get_update_states():
+                stored.set_update_state(entity_id, state)
+            stored.save()
+        finally:
+            stored.close()
+        os.replace(tmp_filename + '.session', tmp_filename)
+
+        conn = sqlite3.connect(tmp_filename)
+        try:
+            conn.executemany(
+                'insert or replace into entities (id, hash, username, phone, name) values (?,?,?,?,?)',
+                list(self._entities)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        # Without the syncs a power loss can leave an empty file after the
+        # rename, losing the auth key
+        fsync_path(tmp_filename)
+        os.replace(tmp_filename, self.filename)
+        fsync_path(os.path.dirname(os.path.abspath(self.filename)))
+        self._dirty = False
+        return True
+
+def save_json_atomic(data, path):
+    """
+    Write JSON to a temporary file and rename it over the target
+
+    A crash mid-write leaves either the old or the new file, never a truncated one.
+
+    Args:
+        data: JSON-serializable object
+        path: Target file path
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_path(os.path.dirname(os.path.abspath(path)))
+
+class SessionsInfoState:
+    """
+    Tracks unsaved changes of the in-memory sessions_info list
+
+    While the parser runs, the list in memory is the authority: status and
+    cooldown changes only mark it dirty, and flush() writes it atomically.
+    Flushes happen on the session flush timer and on shutdown.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.dirty = False
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def flush(self, sessions_info):
+        """
+        Write sessions_info to disk if it changed since the last flush
+
+        Args:
+            sessions_info: List of all sessions
+
+        Returns:
+            bool: Whether the file was written
+        """
+        if not self.dirty:
+            return False
+        try:
+            save_json_atomic(sessions_info, self.path)
+        except Exception as e:
+            print(f"Error saving {self.path}: {str(e)}")
+            return False
+        self.dirty = False
+        return True
+
+def open_session(session_path, in_memory=False):
+    """
+    Get the session argument for TelegramClient
+
+    Args:
+        session_path: Path of the session file (with or without .session)
+        in_memory: Whether to keep the session in memory with periodic persistence
+
+    Returns:
+        PersistentMemorySession or the path itself for the default SQLite session
+    """
+    if in_memory:
+        return PersistentMemorySession(session_path)
+    return session_path
+
+def persist_client_session(client):
+    """
+    Flush the client's session to disk if it is kept in memory
+
+    Args:
+        client: Telegram client
+    """
+    if isinstance(client.session, PersistentMemorySession):
+        try:
+            client.session.persist()
+        except Exception as e:
+            print(f"Error saving session {client.session.filename}: {str(e)}")
+
+async def flush_sessions_periodically(clients, interval=SESSION_FLUSH_INTERVAL, sessions_info=None, sessions_state=None):
+    """
+    Background task: flush in-memory sessions of all pooled clients and
+    pending sessions_info changes on a timer
+
+    Args:
+        clients: Dict of session_name -> client
+        interval: Seconds between flushes
+        sessions_info: List of all sessions
+        sessions_state: SessionsInfoState of sessions_info
+    """
+    while True:
+        await asyncio.sleep(interval)
+        for client in list(clients.values()):
+            persist_client_session(client)
+        if sessions_state is not None:
+            sessions_state.flush(sessions_info)
@@ -4,6 +4,8 @@ import json
 from telethon import TelegramClient
 from telethon.errors import UpdateAppToLoginError
 from dotenv import load_dotenv
+from api_credentials import get_api_credentials
+from session_storage import open_session, persist_client_session, save_json_atomic
 
 # Load environment variables
 load_dotenv()
@@ -11,6 +13,7 @@ load_dotenv()
 # Configuration
 SESSIONS_DIR = "sessions"  # Directory to store session files
 SESSIONS_INFO_FILE = "sessions/sessions_info.json"  # File to store sessions metadata
+MEMORY_SESSIONS = os.getenv('TELEGRAM_MEMORY_SESSIONS') == '1'  # Keep sessions in memory, write once at the end
 
 async def create_session(session_name, api_id, api_hash):
     """
@@ -28,19 +31,21 @@ async def create_session(session_name, api_id, api_hash):
     
     try:
         # Create client
-        client = TelegramClient(session_path, api_id, api_hash, system_version="4.16.30-vxCUSTOM")
+        client = TelegramClient(open_session(session_path, MEMORY_SESSIONS), api_id, api_hash, system_version="4.16.30-vxCUSTOM")
         
         try:
             await client.start()
         except UpdateAppToLoginError:
             print(f"\nError: Telethon version is outdated for {session_name}")
             await client.disconnect()
+            persist_client_session(client)
             return False
             
         # Check if already authorized
         if await client.is_user_authorized():
             print(f"Session {session_name} is already authorized.")
             await client.disconnect()
+            persist_client_session(client)
             return True
             
         # If not authorized, request phone and code
@@ -59,6 +64,7 @@ async def create_session(session_name, api_id, api_hash):
             
             # Return account info
             await client.disconnect()
+            persist_client_session(client)
             return {
                 "session_name": session_name,
                 "phone": phone,
@@ -70,6 +76,7 @@ async def create_session(session_name, api_id, api_hash):
         except Exception as e:
             print(f"Error authenticating session {session_name}: {str(e)}")
             await client.disconnect()
+            persist_client_session(client)
             return False
             
     except Exception as e:
@@ -97,18 +104,18 @@ async def create_multiple_sessions(num_sessions):
             print(f"Error loading existing sessions: {str(e)}")
             sessions_info = []
     
-    # Load API credentials from environment variables
-    api_id = os.getenv('TELEGRAM_API_ID')
-    api_hash = os.getenv('TELEGRAM_API_HASH')
+    # Credential group for the new sessions (TELEGRAM_API_ID_<GROUP>/TELEGRAM_API_HASH_<GROUP> in .env)
+    api_group = input("API credential group for new sessions (empty for default): ").strip() or None
+    api_id, api_hash, group = get_api_credentials({'api_group': api_group})
     
     if not api_id or not api_hash:
-        print("Error: API credentials not found in .env file")
-        print("Please create a .env file with TELEGRAM_API_ID and TELEGRAM_API_HASH")
+        print(f"Error: API credentials for group '{group}' not found in .env file")
+        if api_group:
+            print(f"Please add TELEGRAM_API_ID_{api_group.upper()} and TELEGRAM_API_HASH_{api_group.upper()} to .env")
+        else:
+            print("Please create a .env file with TELEGRAM_API_ID and TELEGRAM_API_HASH")
         return
     
-    # Convert string to int (API_ID should be an integer)
-    api_id = int(api_id)
-    
     # Calculate how many new sessions to create
     existing_count = len(sessions_info)
     sessions_to_create = max(0, num_sessions - existing_count)
@@ -123,11 +130,15 @@ async def create_multiple_sessions(num_sessions):
         session_info = await create_session(session_name, api_id, api_hash)
         
         if session_info:
+            # An already authorized session file returns True instead of account info
+            if session_info is True:
+                session_info = {"session_name": session_name, "status": "available"}
+            if api_group:
+                session_info['api_group'] = api_group
             sessions_info.append(session_info)
     
     # Save updated sessions info
-    with open(SESSIONS_INFO_FILE, 'w') as f:
-        json.dump(sessions_info, f, indent=4)
+    save_json_atomic(sessions_info, SESSIONS_INFO_FILE)
     
     print(f"\nTotal sessions available: {len(sessions_info)}")
     print(f"Sessions info saved to {SESSIONS_INFO_FILE}")
@@ -138,17 +149,6 @@ async def test_sessions():
         print("No sessions found. Please create sessions first.")
         return
     
-    # Load API credentials from environment variables
-    api_id = os.getenv('TELEGRAM_API_ID')
-    api_hash = os.getenv('TELEGRAM_API_HASH')
-    
-    if not api_id or not api_hash:
-        print("Error: API credentials not found in .env file")
-        return
-    
-    # Convert string to int (API_ID should be an integer)
-    api_id = int(api_id)
-    
     # Load sessions info
     with open(SESSIONS_INFO_FILE, 'r') as f:
         sessions_info = json.load(f)
@@ -161,8 +161,15 @@ async def test_sessions():
         
         print(f"\nTesting session {i+1}/{len(sessions_info)}: {session_name}")
         
+        # Each session may use its own API credentials (see api_credentials.py)
+        api_id, api_hash, group = get_api_credentials(session_info)
+        if not api_id:
+            print(f"No API credentials for session {session_name} (group '{group}')")
+            session_info['status'] = "error"
+            continue
+        
         try:
-            client = TelegramClient(session_path, api_id, api_hash, system_version="4.16.30-vxCUSTOM")
+            client = TelegramClient(open_session(session_path, MEMORY_SESSIONS), api_id, api_hash, system_version="4.16.30-vxCUSTOM")
             await client.start()
             
             if await client.is_user_authorized():
@@ -175,14 +182,14 @@ async def test_sessions():
                 session_info['status'] = "unauthorized"
             
             await client.disconnect()
+            persist_client_session(client)
             
         except Exception as e:
             print(f"Error testing session {session_name}: {str(e)}")
             session_info['status'] = "error"
     
     # Save updated sessions info
-    with open(SESSIONS_INFO_FILE, 'w') as f:
-        json.dump(sessions_info, f, indent=4)
+    save_json_atomic(sessions_info, SESSIONS_INFO_FILE)
     
     print(f"\nSession testing completed. Updated status saved to {SESSIONS_INFO_FILE}")
 
@@ -0,0 +1,407 @@
+import argparse
+import csv
+import os
+import shutil
+import time
+import numpy as np
+
+# Store location: two int64 columns plus an append-only segment log
+STORE_DIR = 'Results/timestamps'
+DATES_FILE = 'dates.i8'
+IDS_FILE = 'ids.i8'
+SEGMENTS_FILE = 'segments.csv'
+METRICS_FILE = 'Results/Metrics.csv'
+
+# Messages fetched per channel for the store (one GetHistory request)
+STORE_HISTORY_LIMIT = 100
+
+DAY = 24 * 60 * 60
+DTYPE = np.dtype('<i8')
+WEEKDAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+class TimestampStore:
+    """
+    Compact on-disk store of post timestamps and ids per channel
+
+    Dates (unix seconds) and message ids are appended to two flat int64 files
+    that are read back memory-mapped. Each channel owns one contiguous segment,
+    sorted by date; segments.csv maps username -> (offset, count, coverage) and
+    the last line for a username wins. Coverage lists the date ranges the
+    fetches actually saw completely, so gaps between separately fetched
+    windows are not mistaken for silence. Re-scraping a channel merges old and
+    new posts into a new segment, the old one stays as garbage until compact().
+    """
+
+    def __init__(self, directory=STORE_DIR):
+        self.directory = directory
+        self.dates_path = os.path.join(directory, DATES_FILE)
+        self.ids_path = os.path.join(directory, IDS_FILE)
+        self.segments_path = os.path.join(directory, SEGMENTS_FILE)
+        self.segments = {}
+        self.size = 0
+        self._load_segments()
+
+    def _load_segments(self):
+        # Finish a compaction that stopped between its two renames
+        if not os.path.exists(self.directory) and os.path.exists(self.directory + '.compact'):
+            os.replace(self.directory + '.compact', self.directory)
+
+        # A run that died between the two column appends leaves one column
+        # longer than the other: drop the unpaired tail
+        sizes = [
+            os.path.getsize(path) // DTYPE.itemsize if os.path.exists(path) else 0
+            for path in (self.dates_path, self.ids_path)
+        ]
+        self.size = min(sizes)
+        for path in (self.dates_path, self.ids_path):
+            if os.path.exists(path) and os.path.getsize(path) > self.size * DTYPE.itemsize:
+                with open(path, 'r+b') as f:
+                    f.truncate(self.size * DTYPE.itemsize)
+
+        if not os.path.exists(self.segments_path):
+            return
+
+        with open(self.segments_path, 'r', encoding='utf-8') as f:
+            for row in csv.reader(f):
+                if len(row) != 4:
+                    continue
+                try:
+                    username, offset, count = row[0], int(row[1]), int(row[2])
+                    coverage = parse_coverage(row[3])
+                except ValueError:
+                    continue
+                # Ignore a segment whose data did not make it to disk
+                if offset + count <= self.size:
+                    self.segments[username] = (offset, count, coverage)
+
+    def _column(self, path):
+        if self.size == 0:
+            return np.empty(0, dtype=DTYPE)
+        return np.memmap(path, dtype=DTYPE, mode='r', shape=(self.size,))
+
+    def get(self, username):
+        """
+        Get stored posts of a channel
+
+        Args:
+            username (str): Channel username
+
+        Returns:
+            Tuple of (dates, ids) int64 arrays sorted by date
+        """
+        segment = self.segments.get(username.lstrip('@').lower())
+        if not segment:
+            return np.empty(0, dtype=DTYPE), np.empty(0, dtype=DTYPE)
+        offset, count, _ = segment
+        return (
+            np.array(self._column(self.dates_path)[offset:offset + count]),
+            np.array(self._column(self.ids_path)[offset:offset + count])
+        )
+
+    def add_messages(self, username, messages, covered):
+        """
+        Merge fetched messages of a channel into the store
+
+        Args:
+            username (str): Channel username with or without @
+            messages (iterable): Telethon messages (with .id and .date)
+            covered (list): (start, end) unix-second ranges the fetches saw
+                completely, see history_coverage()
+
+        Returns:
+            int: Number of posts stored for the channel
+        """
+        key = username.lstrip('@').lower()
+        new_ids = []
+        new_dates = []
+        for message in messages:
+            if message is None or not getattr(message, 'date', None):
+                continue
+            new_ids.append(message.id)
+            new_dates.append(int(message.date.timestamp()))
+
+        old_dates, old_ids = self.get(key)
+        old_coverage = self.segments[key][2] if key in self.segments else []
+        coverage = merge_coverage(old_coverage + list(covered))
+
+        dates = np.concatenate([old_dates, np.array(new_dates, dtype=DTYPE)])
+        ids = np.concatenate([old_ids, np.array(new_ids, dtype=DTYPE)])
+
+        # Deduplicate by message id, then order by date
+        ids, unique = np.unique(ids, return_index=True)
+        dates = dates[unique]
+        order = np.argsort(dates, kind='stable')
+        dates, ids = dates[order], ids[order]
+
+        # Nothing new: the merge kept exactly the stored posts, only coverage grows
+        if len(ids) == len(old_ids) and key in self.segments:
+            if coverage != old_coverage:
+                offset, count, _ = self.segments[key]
+                self._write_segment(key, offset, count, coverage)
+            return len(ids)
+
+        self._append_segment(key, dates, ids, coverage)
+        return len(dates)
+
+    def _write_segment(self, key, offset, count, coverage):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.segments_path, 'a', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow([key, offset, count, format_coverage(coverage)])
+        self.segments[key] = (offset, count, coverage)
+
+    def _append_segment(self, key, dates, ids, coverage):
+        os.makedirs(self.directory, exist_ok=True)
+
+        offset = self.size
+        # Data first, then the segment line: a crash never leaves a dangling segment
+        with open(self.dates_path, 'ab') as f:
+            dates.astype(DTYPE).tofile(f)
+        with open(self.ids_path, 'ab') as f:
+            ids.astype(DTYPE).tofile(f)
+
+        self.size += len(dates)
+        self._write_segment(key, offset, len(dates), coverage)
+
+    def load_all(self):
+        """
+        Gather live segments of all channels into contiguous arrays
+
+        Returns:
+            Tuple of (usernames, dates, channel, coverage) where channel[i] is
+            the index in usernames of the post at dates[i]; posts are grouped by
+            channel and sorted by date within a channel. coverage is a tuple of
+            (channel, start, end) arrays of covered ranges, sorted the same way
+        """
+        usernames = sorted(self.segments)
+        empty = np.empty(0, dtype=np.int64)
+        if not usernames:
+            return usernames, np.empty(0, dtype=DTYPE), empty, (empty, empty, empty)
+
+        column = self._column(self.dates_path)
+        segments = [self.segments[username] for username in usernames]
+        counts = np.array([count for _, count, _ in segments], dtype=np.int64)
+        dates = np.concatenate([column[offset:offset + count] for offset, count, _ in segments])
+        # int64 explicitly: the default is int32 on Windows and compute_metrics shifts it by 32
+        channel = np.repeat(np.arange(len(usernames), dtype=np.int64), counts)
+
+        ranges = [(i, start, end) for i, (_, _, coverage) in enumerate(segments) for start, end in coverage]
+        coverage = tuple(np.array(values, dtype=np.int64) for values in zip(*ranges)) if ranges else (empty, empty, empty)
+        return usernames, np.asarray(dates), channel, coverage
+
+    def compact(self):
+        """
+        Rewrite the store without superseded segments
+
+        The compacted store is written to a sibling directory and swapped in
+        with renames; an interrupted swap is completed on the next load.
+
+        Returns:
+            int: Number of posts kept
+        """
+        new_dir = self.directory + '.compact'
+        old_dir = self.directory + '.old'
+        for path in (new_dir, old_dir):
+            if os.path.exists(path):
+                shutil.rmtree(path)
+
+        compacted = TimestampStore(new_dir)
+        dates_column = self._column(self.dates_path)
+        ids_column = self._column(self.ids_path)
+        for username in sorted(self.segments):
+            start, count, coverage = self.segments[username]
+            compacted._append_segment(
+                username,
+                np.asarray(dates_column[start:start + count]),
+                np.asarray(ids_column[start:start + count]),
+                coverage
+            )
+        del dates_column, ids_column
+        os.makedirs(new_dir, exist_ok=True)
+
+        if os.path.exists(self.directory):
+            os.replace(self.directory, old_dir)
+        os.replace(new_dir, self.directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+        self.segments = compacted.segments
+        self.size = compacted.size
+        return self.size
+
+def history_coverage(messages, limit, until):
+    """
+    Date range a single GetHistory fetch saw completely
+
+    A fetch returns the newest `limit` posts older than `until`; every post
+    between the oldest returned one and `until` is therefore known. A short
+    page means the history was read to the very first post.
+
+    Args:
+        messages (list): Fetched messages, newest first
+        limit (int): Requested page size
+        until (datetime): Upper bound of the fetch (offset_date or fetch time)
+
+    Returns:
+        Tuple of (start, end) unix seconds
+    """
+    end = int(until.timestamp())
+    if len(messages) < limit:
+        return (0, end)
+    dates = [int(message.date.timestamp()) for message in messages if getattr(message, 'date', None)]
+    return (min(dates) if dates else end, end)
+
+def merge_coverage(ranges):
+    """
+    Args:
+        ranges (list): (start, end) ranges in any order
+
+    Returns:
+        list: Sorted non-overlapping ranges with touching ones joined
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def format_coverage(coverage):
+    return ' '.join(f"{start}:{end}" for start, end in coverage)
+
+def parse_coverage(text):
+    return [tuple(int(value) for value in item.split(':')) for item in text.split()]
+
+def compute_metrics(store, now=None):
+    """
+    Compute activity metrics for every channel in one vectorized pass
+
+    Only posts inside covered ranges are trusted: gaps are measured between
+    neighbours in the same covered range, and the 7/30 day windows (ending
+    at the channel's last scrape) are NaN unless fully covered.
+
+    Args:
+        store (TimestampStore): Store to read
+        now (int): Reference unix time, defaults to the current time
+
+    Returns:
+        Tuple of (usernames, metrics) where metrics is a dict name -> array
+        with one value (or row) per channel
+    """
+    usernames, dates, channel, (range_channel, range_start, range_end) = store.load_all()
+    n = len(usernames)
+    now = int(now if now is not None else time.time())
+
+    counts = np.bincount(channel, minlength=n)
+    has_posts = counts > 0
+    ends = np.cumsum(counts) - 1
+
+    last_post = np.full(n, -1, dtype=np.int64)
+    first_post = np.full(n, -1, dtype=np.int64)
+    last_post[has_posts] = dates[ends[has_posts]]
+    first_post[has_posts] = dates[(ends - counts + 1)[has_posts]]
+
+    # Covered range of every post: ranges are sorted by (channel, start), so a
+    # combined channel/date key lets searchsorted find them all at once
+    range_key = (range_channel << 32) + range_start
+    post_range = np.searchsorted(range_key, (channel << 32) + dates, side='right') - 1
+    found = post_range >= 0
+    clipped = np.where(found, post_range, 0)
+    covered = found & (range_channel[clipped] == channel) & (dates <= range_end[clipped]) if len(range_key) else found
+
+    # Gaps between consecutive posts of the same covered range
+    same_range = (post_range[1:] == post_range[:-1]) & covered[1:] & covered[:-1]
+    gap_channel = channel[1:][same_range]
+    gaps = np.diff(dates)[same_range]
+    gap_count = np.bincount(gap_channel, minlength=n)
+    gap_sum = np.bincount(gap_channel, weights=gaps, minlength=n)
+    max_gap = np.zeros(n)
+    np.maximum.at(max_gap, gap_channel, gaps)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_gap_hours = np.where(gap_count > 0, gap_sum / gap_count / 3600, np.nan)
+    max_gap_hours = np.where(gap_count > 0, max_gap / 3600, np.nan)
+
+    # Windows end at the last scrape; the newest covered range of a channel
+    # is the last one in its group
+    scraped_at = np.full(n, -1, dtype=np.int64)
+    latest_start = np.full(n, -1, dtype=np.int64)
+    latest = np.searchsorted(range_channel, np.arange(n, dtype=np.int64), side='right') - 1
+    has_range = (latest >= 0) & (range_channel[np.maximum(latest, 0)] == np.arange(n)) if len(range_channel) else np.zeros(n, dtype=bool)
+    scraped_at[has_range] = range_end[latest[has_range]]
+    latest_start[has_range] = range_start[latest[has_range]]
+
+    def window_count(seconds):
+        in_window = dates >= scraped_at[channel] - seconds
+        window = np.bincount(channel[in_window], minlength=n).astype(float)
+        window[(scraped_at < 0) | (latest_start > scraped_at - seconds)] = np.nan
+        return window
+
+    # 1970-01-01 was a Thursday (weekday 3 with Monday = 0), dates are UTC
+    weekday = (dates // DAY + 3) % 7
+    per_weekday = np.bincount(channel * 7 + weekday, minlength=n * 7).reshape(n, 7)
+
+    metrics = {
+        'stored_posts': counts,
+        'last_post': last_post,
+        'first_post': first_post,
+        'scraped_at': scraped_at,
+        'posts_7d': window_count(7 * DAY),
+        'posts_30d': window_count(30 * DAY),
+        'mean_gap_hours': mean_gap_hours,
+        'max_gap_hours': max_gap_hours,
+        'days_since_last_post': np.where(has_posts, (now - last_post) / DAY, np.nan)
+    }
+    for i, name in enumerate(WEEKDAYS):
+        metrics[f'posts_{name}'] = per_weekday[:, i]
+
+    return usernames, metrics
+
+def format_metric(name, value):
+    if name in ('last_post', 'first_post', 'scraped_at'):
+        return '-' if value < 0 else str(np.datetime64(int(value), 's').astype('datetime64[D]'))
+    if isinstance(value, (float, np.floating)):
+        if np.isnan(value):
+            return '-'
+        # Window counts are floats only to carry NaN for uncovered windows
+        return str(int(value)) if name.startswith('posts_') else f"{value:.1f}"
+    return str(value)
+
+def save_metrics(usernames, metrics, path=METRICS_FILE):
+    """
+    Save metrics as CSV, one row per channel
+
+    Args:
+        usernames (list): Channel usernames
+        metrics (dict): name -> array from compute_metrics()
+        path (str): Output CSV path
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    names = list(metrics)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['username'] + names)
+        for i, username in enumerate(usernames):
+            writer.writerow(['@' + username] + [format_metric(name, metrics[name][i]) for name in names])
+
+def main():
+    parser = argparse.ArgumentParser(description="Activity metrics from stored post timestamps")
+    parser.add_argument('--store', default=STORE_DIR, help="Timestamp store directory")
+    parser.add_argument('--output', default=METRICS_FILE, help="Metrics CSV path")
+    parser.add_argument('--compact', action='store_true', help="Drop superseded segments from the store first")
+    args = parser.parse_args()
+
+    store = TimestampStore(args.store)
+
+    if args.compact:
+        kept = store.compact()
+        print(f"Store compacted: {kept} posts kept")
+
+    usernames, metrics = compute_metrics(store)
+    save_metrics(usernames, metrics, args.output)
+    print(f"Metrics for {len(usernames)} channels saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
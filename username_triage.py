@@ -0,0 +1,180 @@
+import csv
+import os
+import re
+from crawl_frontier import BloomFilter
+
+# Telegram usernames: a-z, 0-9 and underscores, starting with a letter.
+# Regular usernames are 5-32 characters; collectible ones can be 4.
+USERNAME_PATTERN = re.compile(r'^[a-z][a-z0-9_]{3,31}$', re.IGNORECASE)
+
+# Prefixes that appear in raw matches instead of a bare @username
+LINK_PREFIX_PATTERN = re.compile(r'^(?:https?://)?(?:www\.)?(?:t\.me|telegram\.me)/(?:s/)?', re.IGNORECASE)
+
+# Requests one channel costs in TG_parser: resolve, full channel, last message, week history
+API_CALLS_PER_CHANNEL = 4
+
+# Telethon error text for handles that resolve to a user or bot instead of a channel
+USER_ERROR_MARKERS = ('InputPeerUser', 'InputUser')
+
+def normalize_username(raw):
+    """
+    Normalize a raw username match
+
+    Args:
+        raw (str): Raw value like '@name', 'name', 't.me/name', '@name/'
+
+    Returns:
+        str: Bare username without @ (may still be invalid)
+    """
+    username = raw.strip()
+    username = LINK_PREFIX_PATTERN.sub('', username)
+    username = username.lstrip('@')
+    # Drop anything after the handle itself: /path, ?query, #fragment
+    username = re.split(r'[/?#\s]', username, maxsplit=1)[0]
+    return username
+
+def is_valid_username(username):
+    """
+    Check a bare username against Telegram's username rules
+
+    Args:
+        username (str): Username without @
+
+    Returns:
+        bool: Whether Telegram could have assigned this username
+    """
+    return (
+        bool(USERNAME_PATTERN.match(username))
+        and not username.endswith('_')
+        and '__' not in username
+    )
+
+def is_bot_username(username):
+    """
+    Bot usernames must end with "bot"; channels cannot take such names
+
+    Args:
+        username (str): Username without @
+
+    Returns:
+        bool: Whether the username belongs to a bot
+    """
+    return username.lower().endswith('bot')
+
+def load_known_users(table_file):
+    """
+    Collect handles that earlier runs found to be users or bots, not channels
+
+    Args:
+        table_file (str): Path to the results CSV
+
+    Returns:
+        set: Lowercase usernames without @
+    """
+    known_users = set()
+    if not os.path.exists(table_file):
+        return known_users
+
+    try:
+        with open(table_file, 'r', encoding='utf-8') as f:
+            for row in csv.reader(f):
+                if len(row) >= 2 and any(marker in row[1] for marker in USER_ERROR_MARKERS):
+                    known_users.add(normalize_username(row[0]).lower())
+    except Exception as e:
+        print(f"Error reading {table_file}: {str(e)}")
+
+    return known_users
+
+def triage_usernames(usernames, known_users=None, seen=None):
+    """
+    Normalize usernames and drop those that would waste an API call
+
+    Args:
+        usernames (iterable): Raw usernames in input order
+        known_users (set): Lowercase usernames known to be users/bots
+        seen (set or BloomFilter): Lowercase usernames already scheduled; updated in place.
+            Hits in a BloomFilter may be false positives and are reported as
+            'probable_duplicate' instead of 'duplicate'
+
+    Returns:
+        Tuple of (accepted, skipped) where:
+            accepted: List of '@username' in input order, first spelling wins
+            skipped: List of (raw, reason) with reason in
+                invalid/bot/user/duplicate/probable_duplicate
+    """
+    known_users = known_users or set()
+    seen = set() if seen is None else seen
+    duplicate = 'probable_duplicate' if isinstance(seen, BloomFilter) else 'duplicate'
+    accepted = []
+    skipped = []
+
+    for raw in usernames:
+        username = normalize_username(raw)
+        key = username.lower()
+
+        if not is_valid_username(username):
+            skipped.append((raw, 'invalid'))
+        elif is_bot_username(username):
+            skipped.append((raw, 'bot'))
+        elif key in known_users:
+            skipped.append((raw, 'user'))
+        elif key in seen:
+            skipped.append((raw, duplicate))
+        else:
+            seen.add(key)
+            accepted.append('@' + username)
+
+    return accepted, skipped
+
+def save_skipped(skipped, path, append=False):
+    """
+    Save skipped usernames with the reason to a CSV so they can be reviewed
+
+    Args:
+        skipped (list): List of (raw, reason)
+        path (str): Output CSV path
+        append (bool): Append to the file instead of rewriting it
+    """
+    if append and not skipped:
+        return
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    file_exists = append and os.path.exists(path) and os.path.getsize(path) > 0
+    with open(path, 'a' if append else 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if not file_exists:
+            writer.writerow(['Юзернейм', 'Причина'])
+        writer.writerows(skipped)
+
+def count_reasons(skipped, counts=None):
+    """
+    Tally skipped usernames by reason
+
+    Args:
+        skipped (list): List of (raw, reason)
+        counts (dict): Existing tally to update in place
+
+    Returns:
+        dict: reason -> count
+    """
+    counts = {} if counts is None else counts
+    for _, reason in skipped:
+        counts[reason] = counts.get(reason, 0) + 1
+    return counts
+
+def print_report(total, accepted_count, reason_counts):
+    """
+    Print how many usernames were dropped and how many API calls that saves
+
+    Args:
+        total (int): Number of input usernames
+        accepted_count (int): Number of accepted usernames
+        reason_counts (dict): reason -> number of skipped usernames
+    """
+    skipped_count = sum(reason_counts.values())
+    details = ', '.join(f"{reason}: {count}" for reason, count in sorted(reason_counts.items())) or 'none'
+    print(f"Triage: {total} usernames, {accepted_count} accepted, {skipped_count} skipped ({details}). "
+          f"Saved ~{skipped_count * API_CALLS_PER_CHANNEL} API calls.")